@@ -1,54 +1,281 @@
 
-from mca import Region, Block, EmptyRegion, EmptyChunk, EmptySection
-from mca.errors import ChunkNotFound, OutOfBoundsCoordinates
-from mca.nbt import NBTFile
+from mca import Block, World, WorldEditor, VolumeWriter
+from mca.errors import ChunkNotFound
+from mca.volume import greedy_mesh, hidden_blocks, downsample
 from nbt.world import WorldFolder
-import random, copy, uuid, re, nbt
+import uuid, re, array, json, zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, repeat
 
 ChunkDict = {}
-names = locals()
+# World opened once by each worker of box_to_bbmodel, see open_world
+WORLDS = {}
+# Blocks left out of the models
+AIR_BLOCKS = {'air', 'cave_air', 'void_air'}
+# Blocks that do not hide the blocks behind them
+TRANSPARENT_BLOCKS = {
+    'water', 'lava', 'glass', 'glass_pane', 'tinted_glass', 'ice', 'barrier', 'light',
+    'oak_leaves', 'spruce_leaves', 'birch_leaves', 'jungle_leaves', 'acacia_leaves', 'dark_oak_leaves',
+    'mangrove_leaves', 'cherry_leaves', 'azalea_leaves', 'flowering_azalea_leaves',
+    'grass', 'short_grass', 'tall_grass', 'fern', 'large_fern', 'dead_bush', 'seagrass', 'tall_seagrass', 'kelp', 'kelp_plant',
+    'snow', 'torch', 'wall_torch', 'ladder', 'vine', 'spawner', 'chest', 'cobweb',
+}
 bbmodel_template = {"meta":{"format_version":"4.10","model_format":"java_block","box_uv":False},"name":None,"parent":"","ambientocclusion":False,"front_gui_light":False,"visible_box":[0,0,0],"variable_placeholders":"","variable_placeholder_buttons":[],"unhandled_root_fields":{},"resolution":{"width":16,"height":16},"elements":[],"outliner":[],"textures":[]}
+group_template = {"name":"group","origin":[0,0,0],"color":0,"uuid":None,"export":True,"mirror_uv":False,"isOpen":False,"locked":False,"visibility":True,"autouv":0,"children":[]}
 cude_template = {"name":"cube","box_uv":False,"rescale":False,"locked":False,"render_order":"default","allow_mirror_modeling":False,"from":[],"to":[],"autouv":1,"color":0,"origin":[0,0,0],"faces":{"north":{"uv":[0,0,1,1]},"east":{"uv":[0,0,1,1]},"south":{"uv":[0,0,1,1]},"west":{"uv":[0,0,1,1]},"up":{"uv":[0,0,1,1]},"down":{"uv":[0,0,1,1]}},"type":"cube","uuid":None}
 
 def one_chunk_to_bbmodel(DICT):
-    for l, y in enumerate(DICT[list(DICT.keys())[0]].keys()):
-        for m, z in enumerate(DICT[list(DICT.keys())[0]][y]):
-            for n, x in enumerate(z):
-                if x != 'None' and x != 'air':
-                    UUID = str(uuid.uuid1())
-                    cude_template["name"] = x
-                    cude_template["from"] = [n,l,m]
-                    cude_template["to"] = [n+1,l+1,m+1]
-                    cude_template["uuid"] = UUID
-                    cude_template["color"] = random.choices(range(0, 16))
-                    bbmodel_template["name"] = list(DICT.keys())[0]
-                    bbmodel_template["elements"].append(copy.deepcopy(cude_template))
-                    bbmodel_template["outliner"].append(copy.deepcopy(UUID))
-    bbmodel = str(bbmodel_template)
-    bbmodel = re.sub(r"\s+", "", bbmodel)
-    bbmodel = bbmodel.replace("'", '"')
-    bbmodel = bbmodel.replace("True", 'true')
-    bbmodel = bbmodel.replace("False", 'false')
-    with open('{}.bbmodel'.format(list(DICT.keys())[0]), 'w') as f:
-        print(bbmodel, file=f)
+    layers = DICT[list(DICT.keys())[0]]
+    # Blocks as indexes in YZX order, 0 for the ones left out
+    names = [None]
+    ids = dict.fromkeys(AIR_BLOCKS | {'None'}, 0)
+    indexes = array.array('H')
+    for y in layers.values():
+        for z in y:
+            for x in z:
+                if x not in ids:
+                    ids[x] = len(names)
+                    names.append(x)
+                indexes.append(ids[x])
+    size_z = len(next(iter(layers.values()), []))
+    size_x = len(indexes) // (len(layers) * size_z) if size_z else 0
+
+    # Hidden blocks are left out, the ones on the sides of the chunk are kept
+    cull_hidden(indexes, names, size_x, len(layers), size_z, TRANSPARENT_BLOCKS)
+    # One cube for each box of the same block, colored by block
+    cubes = ((names[i], [x1,y1,z1], [x2,y2,z2], block_color(names[i])) for x1, y1, z1, x2, y2, z2, i in greedy_mesh(indexes, size_x, len(layers), size_z))
+    write_bbmodel('{}.bbmodel'.format(list(DICT.keys())[0]), list(DICT.keys())[0], cubes)
+
+def block_color(name):
+    # Color of the cubes of a block, the same in every model
+    return zlib.crc32(name.encode()) % 16
+
+def write_bbmodel(filename, name, cubes, groups=None):
+    # cubes is an iterable of (block name, from, to, color), each one is written
+    # to the file when it comes, so the model is never all in memory.
+    # groups is a list of (group name, number of cubes) for the outliner, in the
+    # same order as the cubes. It is only read once all the cubes are written,
+    # so it can be filled while going through cubes.
+    # Cube ids are the model's own uuid with the cube number in the last bits,
+    # group ids come after them
+    base = uuid.uuid5(uuid.NAMESPACE_OID, name).hex
+    prefix = '{}-{}-{}-{}-'.format(base[:8], base[8:12], base[12:16], base[16:20])
+    low = int(base[20:], 16)
+    count = 0
+    with open(filename, 'w') as f:
+        f.write('{')
+        for n, (key, value) in enumerate(bbmodel_template.items()):
+            if n:
+                f.write(',')
+            f.write(json.dumps(key) + ':')
+            if key == 'name':
+                f.write(json.dumps(name))
+            elif key == 'elements':
+                f.write('[')
+                for block, start, end, color in cubes:
+                    cube = dict(cude_template, name=block, color=color, uuid=prefix + format(low ^ count, '012x'))
+                    cube['from'] = start
+                    cube['to'] = end
+                    if count:
+                        f.write(',')
+                    f.write(json.dumps(cube, separators=(',', ':')))
+                    count += 1
+                f.write(']')
+            elif key == 'outliner' and groups is not None:
+                f.write('[')
+                first = 0
+                for n, (group, size) in enumerate(groups):
+                    if n:
+                        f.write(',')
+                    # children is the last key, the dump ends with '[]}' and cube ids go in between
+                    f.write(json.dumps(dict(group_template, name=group, uuid=prefix + format(low ^ (count + n), '012x')), separators=(',', ':'))[:-2])
+                    f.write(','.join('"' + prefix + format(low ^ i, '012x') + '"' for i in range(first, first + size)))
+                    f.write(']}')
+                    first += size
+                f.write(']')
+            elif key == 'outliner':
+                f.write('[')
+                for i in range(count):
+                    if i:
+                        f.write(',')
+                    f.write('"' + prefix + format(low ^ i, '012x') + '"')
+                f.write(']')
+            else:
+                f.write(json.dumps(value, separators=(',', ':')))
+        f.write('}\n')
+
+def cull_hidden(indexes, names, size_x, size_y, size_z, transparent, border=None):
+    # Sets to 0 the indexes of the blocks surrounded by solid blocks.
+    # Names in transparent and index 0 are not solid. border gives whether each
+    # block around the volume is solid, as (x, y, z) -> bool with -1 and size
+    # for the coordinates outside, missing ones are not solid.
+    px, py, pz = size_x + 2, size_y + 2, size_z + 2
+    table = bytes(0 if i == 0 or names[i] in transparent else 1 for i in range(len(names)))
+    core = bytes(map(table.__getitem__, indexes))
+    solid = bytearray(px * py * pz)
+    for y in range(size_y):
+        for z in range(size_z):
+            i = (y * size_z + z) * size_x
+            j = ((y + 1) * pz + z + 1) * px + 1
+            solid[j:j + size_x] = core[i:i + size_x]
+    if border:
+        for (x, y, z), is_solid in border.items():
+            solid[((y + 1) * pz + z + 1) * px + x + 1] = is_solid
+
+    hidden = hidden_blocks(solid, px, py, pz)
+    for y in range(size_y):
+        for z in range(size_z):
+            j = ((y + 1) * pz + z + 1) * px + 1
+            if 1 in hidden[j:j + size_x]:
+                i = (y * size_z + z) * size_x
+                for x in range(size_x):
+                    if hidden[j + x]:
+                        indexes[i + x] = 0
+
+def box_border(world, loaded, x1, y1, z1, x2, y2, z2, transparent, bounds):
+    # Whether each block around the box (x1, y1, z1) to (x2, y2, z2) in world coordinates
+    # is solid, as a border for cull_hidden. loaded caches the chunks by coordinates.
+    # Only the blocks inside bounds, the whole exported box, are read. The ones outside
+    # are not in the model so they are left out, which means not solid.
+    bx1, by1, bz1, bx2, by2, bz2 = bounds
+    cells = {}
+    for y in range(max(y1 - 1, by1), min(y2 + 1, by2) + 1):
+        for z in range(max(z1 - 1, bz1), min(z2 + 1, bz2) + 1):
+            if y1 <= y <= y2 and z1 <= z <= z2:
+                xs = [x for x in (x1 - 1, x2 + 1) if bx1 <= x <= bx2]
+            else:
+                xs = range(max(x1 - 1, bx1), min(x2 + 1, bx2) + 1)
+            for x in xs:
+                cells.setdefault((x >> 4, z >> 4), []).append((x, y, z))
+
+    border = {}
+    for (cx, cz), coords in cells.items():
+        if (cx, cz) not in loaded:
+            try:
+                loaded[cx, cz] = world.get_chunk(cx, cz)
+            except ChunkNotFound:
+                loaded[cx, cz] = None
+        if loaded[cx, cz] is None:
+            continue
+        palette, ids = loaded[cx, cz].get_blocks([x & 15 for x, y, z in coords], [y for x, y, z in coords], [z & 15 for x, y, z in coords], as_ids=True)
+        solids = [block.id not in AIR_BLOCKS and block.id not in transparent for block in palette]
+        for (x, y, z), i in zip(coords, ids):
+            border[x - x1, y - y1, z - z1] = solids[i]
+    return border
+
+def open_world(world_folder):
+    # Initializer of the box_to_bbmodel workers, the World keeps the regions it read
+    # so each worker reads a region file once however many batches of it it gets
+    WORLDS[world_folder] = World(world_folder)
+
+def mesh_region(world_folder, chunks, bounds, cull=True, transparent=TRANSPARENT_BLOCKS):
+    # Meshes the boxes of a batch of chunks, best from one region, chunks is a list
+    # of (chunk x, chunk z, (x1, y1, z1, x2, y2, z2)) with the box inside the chunk.
+    # bounds is the whole exported box (x1, y1, z1, x2, y2, z2) in world coordinates.
+    # Returns (chunk x, chunk z, cubes) for each chunk found, with cubes
+    # as for write_bbmodel and relative to the lowest corner of bounds.
+    # With cull, blocks that can not be seen are left out, looking through
+    # the neighbouring chunks for the blocks on the sides that are in bounds.
+    world = WORLDS.get(world_folder) or World(world_folder)
+    ox, oy, oz = bounds[:3]
+    results = []
+    loaded = {}
+    for cx, cz, (x1, y1, z1, x2, y2, z2) in chunks:
+        if (cx, cz) not in loaded:
+            try:
+                loaded[cx, cz] = world.get_chunk(cx, cz)
+            except ChunkNotFound:
+                loaded[cx, cz] = None
+        chunk = loaded[cx, cz]
+        if chunk is None:
+            continue
+        # Volume of the box as indexes in names, read section by section
+        names = [None]
+        ids = {}
+        indexes = array.array('H')
+        for sy in range(y1 >> 4, (y2 >> 4) + 1):
+            palette, section = chunk.stream_indices(sy)
+            remap = []
+            for block in palette:
+                if block.id in AIR_BLOCKS:
+                    remap.append(0)
+                    continue
+                if block.id not in ids:
+                    ids[block.id] = len(names)
+                    names.append(block.id)
+                remap.append(ids[block.id])
+            for y in range(max(y1, sy * 16), min(y2, sy * 16 + 15) + 1):
+                for z in range(z1, z2 + 1):
+                    i = (y & 15) * 256 + z * 16
+                    indexes.extend(map(remap.__getitem__, section[i + x1:i + x2 + 1]))
+
+        x0, z0 = cx * 16 + x1 - ox, cz * 16 + z1 - oz
+        if cull:
+            border = box_border(world, loaded, cx * 16 + x1, y1, cz * 16 + z1, cx * 16 + x2, y2, cz * 16 + z2, transparent, bounds)
+            cull_hidden(indexes, names, x2 - x1 + 1, y2 - y1 + 1, z2 - z1 + 1, transparent, border)
+        cubes = []
+        for bx1, by1, bz1, bx2, by2, bz2, i in greedy_mesh(indexes, x2 - x1 + 1, y2 - y1 + 1, z2 - z1 + 1):
+            cubes.append((names[i], [x0 + bx1, y1 - oy + by1, z0 + bz1], [x0 + bx2, y1 - oy + by2, z0 + bz2], block_color(names[i])))
+        results.append((cx, cz, cubes))
+    return results
+
+def box_to_bbmodel(world_folder, x1, y1, z1, x2, y2, z2, filename=None, workers=None, cull=True, transparent=TRANSPARENT_BLOCKS):
+    # Exports the blocks from (x1, y1, z1) to (x2, y2, z2) in world coordinates
+    # as one model, with a group for each chunk. Rows of chunks are meshed in parallel
+    # and written in order, the model starts at the lowest corner of the box.
+    # cull and transparent are passed to mesh_region.
+    x1, x2 = min(x1, x2), max(x1, x2)
+    y1, y2 = max(min(y1, y2), -64), min(max(y1, y2), 319)
+    z1, z2 = min(z1, z2), max(z1, z2)
+    name = 'Box({},{},{},{},{},{})'.format(x1, y1, z1, x2, y2, z2)
+
+    # Part of the box in each chunk, by region
+    regions = {}
+    for cz in range(z1 >> 4, (z2 >> 4) + 1):
+        for cx in range(x1 >> 4, (x2 >> 4) + 1):
+            box = (max(x1 - cx * 16, 0), y1, max(z1 - cz * 16, 0), min(x2 - cx * 16, 15), y2, min(z2 - cz * 16, 15))
+            regions.setdefault((cx >> 5, cz >> 5), []).append((cx, cz, box))
+    # One task per row of chunks in a region, so a box in a single region is still
+    # split between the workers and each one only holds the cubes of a row
+    batches = [list(row) for chunks in regions.values() for cz, row in groupby(chunks, lambda chunk: chunk[1])]
+
+    groups = []
+    def cubes(results):
+        for batch_results in results:
+            for cx, cz, chunk_cubes in batch_results:
+                groups.append(('Chunk({},{})'.format(cx, cz), len(chunk_cubes)))
+                yield from chunk_cubes
+
+    bounds = (x1, y1, z1, x2, y2, z2)
+    with ProcessPoolExecutor(max_workers=workers, initializer=open_world, initargs=(world_folder,)) as executor:
+        results = executor.map(mesh_region, repeat(world_folder), batches, repeat(bounds), repeat(cull), repeat(transparent))
+        write_bbmodel(filename or '{}.bbmodel'.format(name), name, cubes(results), groups)
 
 def get_one_chunk(chunk, y_range):
     DICT = {}
-    for y in y_range:
-        DICT['{}'.format(y)] = []
-        for z in range(16):
-            DICT['{}'.format(y)].append([])
-            for x in range(16):
-                DICT['{}'.format(y)][z].append([str(chunk.get_block(x, y, z)).split(':')[1] if ':' in str(chunk.get_block(x, y, z)) else 'None'][0])
+    # Each section of y_range is decoded once, then rows are read from the indexes
+    names, indexes = chunk.get_slab(y_range)
+    names = [str(name).split(':')[1] if ':' in str(name) else 'None' for name in names]
+    for i, y in enumerate(y_range):
+        DICT['{}'.format(y)] = [[names[p] for p in indexes[i*256 + z*16:i*256 + z*16 + 16]] for z in range(16)]
     #one_chunk_to_bbmodel({str(chunk):DICT})
     return DICT
 
+def chunk_coords(chunkList):
+    # Keys are like 'Chunk(x,z)', returns them by chunk coordinates
+    coords = {}
+    for key in chunkList.keys():
+        m = re.match(r'Chunk\((-?\d+),\s*(-?\d+)\)', key)
+        coords[int(m.group(1)), int(m.group(2))] = key
+    return coords
+
 def get_chunk_block(world_folder, chunkList):
     world = WorldFolder(world_folder)
     print('Start!!!')
-    for chunk in world.get_chunks():
-        if str(chunk) in chunkList.keys():
-            ChunkDict['{}'.format(chunk)] = copy.deepcopy(get_one_chunk(chunk, chunkList[str(chunk)]))
+    # Only the chunks in chunkList are read
+    coords = chunk_coords(chunkList)
+    for x, z, chunk in world.iter_chunks_at(coords.keys()):
+        ChunkDict[coords[x, z]] = get_one_chunk(chunk, chunkList[coords[x, z]])
     #with open('outputETO.txt', 'w') as f:
     #    print(ChunkDict, file=f)
     print('Done!!!')
@@ -56,130 +283,72 @@ def get_chunk_block(world_folder, chunkList):
 
 #get_chunk_block(r'D:\Program Files\PCL2\.minecraft\saves\118', {'Chunk(0,0)': range(-64, 320)})
 
-#def set_single_chunk_block(world_folder, mca_name, blocklist):
-#    region = Region.from_file(world_folder+'\\region\\'+mca_name)
-#    new_region = EmptyRegion(0, 0)
-#    new_chunk_set = set()
-#    chunkList = {}
-#    nx_nz = set()
-#    for block in blocklist:
-#        id, x, y, z = block
-#        nx, nz, ny = x//16, z//16, y//16
-#        names['new_chunk_%s_%s' % (nx, nz)] = EmptyChunk(nx, nz)
-#        new_chunk_set.add(names['new_chunk_%s_%s' % (nx, nz)])
-#        chunkList['Chunk(%s,%s)' % (nx, nz)] = range(-64, 320)
-#        nx_nz.add((nx, nz))
-#    ChunkDict = get_chunk_block(world_folder, chunkList)
-#    for l in list(ChunkDict):
-#        for m in ChunkDict[l].keys():
-#            y = int(m)
-#            for z, n in enumerate(ChunkDict[l][m]):
-#                for x, id in enumerate(ChunkDict[l][m][z]):
-#                    if id == 'None':
-#                        names['new_chunk_%s_%s' % (l[6:-1].split(",")[0], l[6:-1].split(",")[1])].set_block(Block('air'), x, y, z)
-#                    else:
-#                        names['new_chunk_%s_%s' % (l[6:-1].split(",")[0], l[6:-1].split(",")[1])].set_block(Block(id), x, y, z)
-#    for block in blocklist:
-#        id, x, y, z = block
-#        nx, nz = x // 16, z // 16
-#        names['new_chunk_%s_%s' % (nx, nz)].set_block(Block(id), x%16, y, z%16)
-#    for x in range(32):
-#        for z in range(32):
-#            if (x, z) not in nx_nz:
-#                try:
-#                    new_region.add_chunk(region.get_chunk(x, z))
-#                except ChunkNotFound:
-#                    pass
-#    for new_chunk in list(new_chunk_set):
-#        new_region.add_chunk(new_chunk)
-#    new_region.save(world_folder+'\\region\\'+mca_name) # h*(32*16)**2
-#
-#blocklist = [['diamond_block', 300, 200, 300], ['gold_block', 301, 200, 300], ['gold_block', 300, 200, 301], ['diamond_block', 301, 200, 301]]
-#
-#set_single_chunk_block(r'D:\Program Files\PCL2\.minecraft\saves\118', 'r.0.0.mca', blocklist)
+def export_chunk_block(world_folder, chunkList, filename, compress=True):
+    # Same chunkList as get_chunk_block, with ranges of consecutive Y.
+    # Each chunk is written to the volume file (see mca.volume_file) once read,
+    # read it back with mca.VolumeReader
+    world = WorldFolder(world_folder)
+    coords = chunk_coords(chunkList)
+    with VolumeWriter(filename, compress) as writer:
+        for x, z, chunk in world.iter_chunks_at(coords.keys()):
+            y_range = chunkList[coords[x, z]]
+            names, indexes = chunk.get_slab(y_range)
+            writer.write(x, z, y_range[0], names, indexes)
 
+def chunk_lod(chunk, factors=(2, 4, 8)):
+    # Downsampled volumes of a mca chunk, each cell being its most common block
+    # that is not air. Blocks are named with their namespace like in export_chunk_block, None for air.
+    # Returns (names, {factor: indexes}) with the indexes in YZX order from Y -64
+    names = [None]
+    ids = {}
+    levels = {factor: array.array('H') for factor in factors}
+    for palette, section in chunk.stream_chunk_indices():
+        remap = []
+        for block in palette:
+            if block.id in AIR_BLOCKS:
+                remap.append(0)
+                continue
+            name = block.name()
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+            remap.append(ids[name])
+        section = array.array('H', map(remap.__getitem__, section))
+        for factor in factors:
+            levels[factor].extend(downsample(section, 16, 16, 16, factor))
+    return names, levels
+
+def export_lod(world_folder, cx1, cz1, cx2, cz2, filename, factors=(2, 4, 8), compress=True):
+    # Writes the downsampled levels of the chunks from (cx1, cz1) to (cx2, cz2)
+    # to a volume file, read a level back with mca.VolumeReader.iter_scale(factor)
+    world = World(world_folder)
+    with VolumeWriter(filename, compress) as writer:
+        for cz in range(min(cz1, cz2), max(cz1, cz2) + 1):
+            for cx in range(min(cx1, cx2), max(cx1, cx2) + 1):
+                try:
+                    chunk = world.get_chunk(cx, cz)
+                except ChunkNotFound:
+                    continue
+                names, levels = chunk_lod(chunk, factors)
+                for factor, indexes in levels.items():
+                    writer.write(cx, cz, -64, names, indexes, factor)
+
+#export_chunk_block(r'D:\Program Files\PCL2\.minecraft\saves\118', {'Chunk(0,0)': range(-64, 320)}, 'outputETO.vol')
 
 def set_world_block(world_folder, blocklist):
-    chunkList = {}
-    #section_set = {}
-    new_region_set = {}
-    new_chunk_set = {}
-    new_section_set = {}
-    for block in blocklist:
-        id, x, y, z = block
-        if 'new_region_%s_%s' % (x//512, z//512) not in new_region_set.keys():
-            try:
-                names['mca_region_%s_%s' % (x//512, z//512)] = Region.from_file(world_folder+'\\region\\'+'r.{}.{}.mca'.format(x//512, z//512))
-                #names['new_region_%s_%s' % (x // 512, z // 512)] = Region(names['mca_region_%s_%s' % (x//512, z//512)])
-                names['new_region_%s_%s' % (x//512, z//512)] = EmptyRegion(0, 0)
-                for ax in range(32):
-                    for az in range(32):
-                        try:
-                            names['new_region_%s_%s' % (x//512, z//512)].add_chunk(names['mca_region_%s_%s' % (x//512, z//512)].get_chunk(ax, az))
-                        except ChunkNotFound:
-                            print('Chunk({},{}) not found!'.format(ax, az))
-                        except OutOfBoundsCoordinates:
-                            print('Chunk({},{}) not found!'.format(ax, az))
-                new_region_set['new_region_%s_%s' % (x//512, z//512)] = [names['new_region_%s_%s' % (x//512, z//512)], x//512, z//512]
-            except FileNotFoundError:
-                print('Region r.{}.{}.mca not found!'.format(x//512, z//512))
-        #try:
-        #    for ky in range(-4, 20):
-        #        names['section_%s_%s_%s' % (x//16, z//16, ky)] = names['mca_region_%s_%s' % (x//512, z//512)].get_chunk(x%512//16, z%512//16).get_section(ky)
-        #        section_set['section_%s_%s_%s' % (x//16, z//16, ky)] = [names['section_%s_%s_%s' % (x//16, z//16, ky)], x//16, z//16]
-        #except ChunkNotFound:
-        #    print('Chunk({},{}) not found!'.format(x%512//16, z%512//16))
-        #except KeyError:
-        #    print('Chunk({},{}) not found!'.format(x%512//16, z%512//16))
-        for ky in range(-4, 20):
-            names['new_section_%s_%s_%s' % (x//16, z//16, ky)] = EmptySection(ky)
-            new_section_set['new_section_%s_%s_%s' % (x//16, z//16, ky)] = [names['new_section_%s_%s_%s' % (x//16, z//16, ky)], x//16, z//16]
-        #names['new_section_%s_%s_%s' % (x//16, z//16, y//16)] = EmptySection(y//16)
-        names['new_chunk_%s_%s' % (x//16, z//16)] = EmptyChunk((x%512)//16, (z%512)//16)
-        #new_section_set['new_section_%s_%s_%s' % (x//16, z//16, y//16)] = [names['new_section_%s_%s_%s' % (x//16, z//16, y//16)], x//16, z//16]
-        new_chunk_set['new_chunk_%s_%s' % (x//16, z//16)] = [names['new_chunk_%s_%s' % (x//16, z//16)], x//512, z//512]
-        #chunkList['Chunk(%s,%s)' % (x//16, z//16)] = range((y//16)*16, (y//16)*16+16)
-        chunkList['Chunk(%s,%s)' % (x//16, z//16)] = range(-64, 320)
-
-    print(list(new_section_set))
-    print(list(new_chunk_set))
-    print(list(new_region_set))
-    ChunkDict = get_chunk_block(world_folder, chunkList)
-    for l in list(ChunkDict):
-        for m in ChunkDict[l].keys():
-            y = int(m)
-            for z, n in enumerate(ChunkDict[l][m]):
-                for x, id in enumerate(ChunkDict[l][m][z]):
-                    if id == 'None':
-                        names['new_section_%s_%s_%s' % (l[6:-1].split(",")[0], l[6:-1].split(",")[1], y//16)].set_block(Block('air'), x, y%16, z)
-                    else:
-                        names['new_section_%s_%s_%s' % (l[6:-1].split(",")[0], l[6:-1].split(",")[1], y//16)].set_block(Block(id), x, y%16, z)
-
-    for block in blocklist:
-        id, x, y, z = block
-        names['new_section_%s_%s_%s' % (x//16, z//16, y//16)].set_block(Block(id), x%16, y%16, z%16)
-
-    #for section in list(section_set):
-    #    print((type(section_set[section][0])))
-    #    names['new_chunk_%s_%s' % (section_set[section][1], section_set[section][2])].add_section(section_set[section][0])
-
-    for section in list(new_section_set):
-        names['new_chunk_%s_%s' % (new_section_set[section][1], new_section_set[section][2])].add_section(new_section_set[section][0])
-
-    for chunk in list(new_chunk_set):
-        try:
-            names['new_region_%s_%s' % (new_chunk_set[chunk][1], new_chunk_set[chunk][2])].add_chunk(new_chunk_set[chunk][0])
-        except KeyError:
-            print('File r.%s.%s.mca not find!' % (new_chunk_set[chunk][1], new_chunk_set[chunk][2]))
-
-    for region in list(new_region_set):
-        try:
-            new_region_set[region][0].save(world_folder+'\\region\\'+'r.{}.{}.mca'.format(new_region_set[region][1], new_region_set[region][2]))
-        except KeyError:
-            print('File r.{}.{}.mca not find!'.format(new_region_set[region][1], new_region_set[region][2]))
-
-blocklist = [['diamond_block', 300, 200, 300], ['gold_block', 301, 200, 300], ['gold_block', 300, 200, 301], ['diamond_block', 301, 200, 301],
-             ['diamond_block', 600, 200, 600], ['gold_block', 601, 200, 600], ['gold_block', 600, 200, 601], ['diamond_block', 601, 200, 601],
-             ['diamond_block', -400, 200, -400], ['gold_block', -401, 200, -400], ['gold_block', -400, 200, -401], ['diamond_block', -401, 200, -401]]
-
-set_world_block(r'D:\Program Files\PCL2\.minecraft\saves\118', blocklist)
+    editor = WorldEditor(world_folder)
+    blocks = {}
+    for id, x, y, z in blocklist:
+        if id not in blocks:
+            blocks[id] = Block.from_name(id)
+        editor.set_block(blocks[id], x, y, z)
+    report = editor.apply()
+    print(report)
+    return report
+
+if __name__ == '__main__':
+    blocklist = [['diamond_block', 300, 200, 300], ['gold_block', 301, 200, 300], ['gold_block', 300, 200, 301], ['diamond_block', 301, 200, 301],
+                 ['diamond_block', 600, 200, 600], ['gold_block', 601, 200, 600], ['gold_block', 600, 200, 601], ['diamond_block', 601, 200, 601],
+                 ['diamond_block', -400, 200, -400], ['gold_block', -401, 200, -400], ['gold_block', -400, 200, -401], ['diamond_block', -401, 200, -401]]
+
+    set_world_block(r'D:\Program Files\PCL2\.minecraft\saves\118', blocklist)
@@ -1,4 +1,4 @@
-from .chunk import Chunk
+from .chunk import Chunk, EditableChunk
 from .biome import Biome
 from .block import Block
 from .region import Region
@@ -6,4 +6,7 @@ from .empty_region import EmptyRegion
 from .empty_chunk import EmptyChunk
 from .empty_section import EmptySection
 from .raw_section import RawSection
+from .world import World, WorldEditor, EditReport
+from .volume_file import VolumeWriter, VolumeReader
+from .structure import Structure
 from . import nbt
@@ -84,5 +84,31 @@ class Block:
         name = tag['Name'].value
         properties = tag.get('Properties')
         if properties:
-            properties = dict(properties)
+            # Properties are all saved as strings
+            properties = {key: value.value for key, value in properties.items()}
         return cls.from_name(name, properties=properties)
+
+    def to_palette(self) -> nbt.TAG_Compound:
+        """
+        Returns the block in the tag format on Section.Palette,
+        the opposite of :class:`Block.from_palette()`
+        """
+        tag = nbt.TAG_Compound()
+        tag.tags.append(nbt.TAG_String(name='Name', value=self.name()))
+        if self.properties:
+            properties = nbt.TAG_Compound()
+            properties.name = 'Properties'
+            for key, value in self.properties.items():
+                if isinstance(value, str):
+                    properties.tags.append(nbt.TAG_String(name=key, value=value))
+                elif isinstance(value, bool):
+                    # booleans are a string saved as either 'true' or 'false'
+                    properties.tags.append(nbt.TAG_String(name=key, value=str(value).lower()))
+                elif isinstance(value, int):
+                    # ints also seem to be saved as a string
+                    properties.tags.append(nbt.TAG_String(name=key, value=str(value)))
+                else:
+                    # assume its a nbt tag and just append it
+                    properties.tags.append(value)
+            tag.tags.append(properties)
+        return tag
@@ -3,13 +3,19 @@ Chunk class
 ref: https://minecraft.wiki/w/Chunk_format
 """
 import sys
-from typing import Union, Tuple, Generator, Optional
+import array
+from typing import Union, Tuple, Generator, Optional, List, Sequence
 
 from . import nbt
 from .block import Block
 from .biome import Biome
+from .empty_section import EmptySection
 from .errors import OutOfBoundsCoordinates, DataNotAvailable
 
+# Sections Y index go from -4 to 19
+MIN_SECTION_Y = -4
+NUM_SECTIONS_PER_CHUNK = 24
+
 
 def bin_append(a, b, length=None):
     """
@@ -20,7 +26,45 @@ def bin_append(a, b, length=None):
     return (a << length) | b
 
 
+# Lookup tables splitting a byte in its two 4 bits halves with bytes.translate()
+_LOW_NIBBLES = bytes(i & 0b1111 for i in range(256))
+_HIGH_NIBBLES = bytes(i >> 4 for i in range(256))
+
+
+def unpack_indices(states: Sequence[int], bits: int, count: int=4096) -> array.array:
+    """
+    Unpacks ``count`` palette indexes of ``bits`` bits each from a long array.
+    Since 1.16 an index does not span across two longs, the leftover bits are padding.
+
+    Returns an ``array('H')``
+
+    Also used by the ``nbt`` package as ``nbt.chunk.unpack_padded()``.
+    """
+    indices = array.array('H')
+    if bits in (4, 8):
+        # Indexes are the bytes or half bytes of the little endian longs,
+        # so they can be split without going through each one in python
+        longs = array.array('Q', [n & 0xFFFFFFFFFFFFFFFF for n in states])
+        if sys.byteorder == 'big':
+            longs.byteswap()
+        data = longs.tobytes()
+        if bits == 4:
+            data, halves = bytearray(len(data) * 2), data
+            data[0::2] = halves.translate(_LOW_NIBBLES)
+            data[1::2] = halves.translate(_HIGH_NIBBLES)
+        indices.extend(data[:count])
+        return indices
+
+    mask = 2**bits - 1
+    shifts = range(0, 64 // bits * bits, bits)
+    for n in states:
+        indices.extend([(n >> shift) & mask for shift in shifts])
+    del indices[count:]
+    return indices
+
+
 def nibble(byte_array, index):
+    """Returns the 4 bits value at given index of a nibble array, like the SkyLight tag"""
     value = byte_array[index // 2]
     if index % 2:
         return value >> 4
@@ -47,7 +91,7 @@ class Chunk:
     tile_entities: :class:`nbt.TAG_Compound`
         ``self.data['TileEntities']`` as an attribute for easier use
     """
-    __slots__ = ('version', 'data', 'x', 'z', 'tile_entities')
+    __slots__ = ('version', 'data', 'x', 'z', 'tile_entities', '_sections', '_tile_entity_index', '_heightmaps')
 
     def __init__(self, nbt_data: nbt.NBTFile):
         try:
@@ -60,6 +104,36 @@ class Chunk:
         self.z = self.data['zPos'].value
         self.tile_entities = self.data['block_entities']
 
+        # Section tags by Y index, found once so lookups don't go through the NBT tree.
+        # Light only sections outside of -4 to 19 are left out
+        self._sections: List[Optional[nbt.TAG_Compound]] = [None] * NUM_SECTIONS_PER_CHUNK
+        if 'sections' in self.data:
+            for section in self.data['sections']:
+                index = section['Y'].value - MIN_SECTION_Y
+                if 0 <= index < NUM_SECTIONS_PER_CHUNK:
+                    self._sections[index] = section
+
+        # Dict of the tile entities by (x, y, z), made on first use by get_tile_entity()
+        # and reset by the methods of EditableChunk changing them
+        self._tile_entity_index: Optional[dict] = None
+
+        # Decoded heightmaps by kind, see heightmap()
+        self._heightmaps = {}
+
+    def edit(self) -> 'EditableChunk':
+        """
+        Returns an editable view of this chunk, refer to :class:`EditableChunk`
+
+        The NBT data is shared but the decoded sections and heightmaps are not,
+        so once the editable chunk is saved this one is out of date and should not be used,
+        make a new :class:`Chunk` from the saved data instead.
+        """
+        return EditableChunk(self.data)
+
+    def save(self) -> nbt.NBTFile:
+        """Returns the chunk NBT data, it's the same as ``self.data``"""
+        return self.data
+
     def get_section(self, y: int) -> nbt.TAG_Compound:
         """
         Returns the section at given y index
@@ -78,14 +152,7 @@ class Chunk:
         if y < -4 or y > 19:
             raise OutOfBoundsCoordinates(f'Y ({y!r}) must be in range of -4 to 19')
 
-        try:
-            sections = self.data["sections"]
-        except KeyError:
-            return None
-
-        for section in sections:
-            if section['Y'].value == y:
-                return section
+        return self._sections[y - MIN_SECTION_Y]
 
     def get_palette(self, section: Union[int, nbt.TAG_Compound]) -> Tuple[Block]:
         """
@@ -101,9 +168,9 @@ class Chunk:
         """
         if isinstance(section, int):
             section = self.get_section(section)
-        if section is None:
+        if section is None or 'block_states' not in section:
             return
-        return tuple(Block.from_palette(i) for i in section['Palette'])
+        return tuple(Block.from_palette(i) for i in section['block_states']['palette'])
 
     def get_block(self, x: int, y: int, z: int, section: Union[int, nbt.TAG_Compound]=None) -> Block:
         """
@@ -132,14 +199,18 @@ class Chunk:
             raise OutOfBoundsCoordinates(f'Y ({y!r}) must be in range of -64 to 319')
 
         if section is None:
-            section = self.get_section(y // 16)
+            section = self._sections[(y >> 4) - MIN_SECTION_Y]
             # global Y to section Y
-            y %= 16
+            y &= 15
 
         # If its an empty section its most likely an air block
         if section is None or 'block_states' not in section:
             return Block.from_name('minecraft:air')
 
+        # Sections of a single block have no data array
+        if 'data' not in section['block_states']:
+            return Block.from_palette(section['block_states']['palette'][0])
+
         # Number of bits each block is on BlockStates
         # Cannot be lower than 4
         bits = max((len(section['block_states']['palette']) - 1).bit_length(), 4)
@@ -169,6 +240,78 @@ class Chunk:
         block = section['block_states']['palette'][palette_id]
         return Block.from_palette(block)
 
+    def _section_indices(self, section: nbt.TAG_Compound) -> Tuple[Optional[nbt.TAG_List], Optional[array.array]]:
+        """
+        Returns the raw block palette of a section tag and its 4096 unpacked indexes.
+        Both are ``None`` if the section has no blocks, which means it's all air.
+        """
+        if section is None or 'block_states' not in section:
+            return None, None
+        palette = section['block_states']['palette']
+        # A section of a single block state has no data array
+        if 'data' not in section['block_states']:
+            return palette, array.array('H', bytes(8192))
+        bits = max((len(palette) - 1).bit_length(), 4)
+        return palette, unpack_indices(section['block_states']['data'], bits)
+
+    def get_blocks(self, xs: Sequence[int], ys: Sequence[int], zs: Sequence[int], as_ids: bool=False):
+        """
+        Returns the blocks at many coordinates at once, in the same order as the coordinates.
+
+        Coordinates are grouped by section so that each section is only decoded once,
+        which is a lot faster than calling :class:`Chunk.get_block` for each of them.
+
+        Parameters
+        ----------
+        xs, ys, zs
+            Block's coordinates in the chunk, with Y being global
+        as_ids
+            If true, returns ``(palette, ids)`` instead, where ``palette`` is a tuple
+            of every different block found and ``ids`` is an ``array('H')`` with the
+            index in ``palette`` of each block.
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If X, Y or Z are not in the proper range
+
+        :rtype: List[:class:`anvil.Block`]
+        """
+        if not len(xs) == len(ys) == len(zs):
+            raise ValueError('xs, ys and zs must have the same length')
+        if not len(xs):
+            return ((), array.array('H')) if as_ids else []
+        if min(xs) < 0 or max(xs) > 15:
+            raise OutOfBoundsCoordinates('X must be in range of 0 to 15')
+        if min(zs) < 0 or max(zs) > 15:
+            raise OutOfBoundsCoordinates('Z must be in range of 0 to 15')
+        if min(ys) < -64 or max(ys) > 319:
+            raise OutOfBoundsCoordinates('Y must be in range of -64 to 319')
+
+        # Position in the input of each coordinate, by section
+        groups = {}
+        for i, y in enumerate(ys):
+            groups.setdefault(y >> 4, []).append(i)
+
+        palette = []
+        palette_ids = {}
+        ids = array.array('H', bytes(2 * len(xs)))
+        for sy, positions in groups.items():
+            blocks, indices = self.stream_indices(sy)
+            # Section palette index to index in the returned palette
+            remap = []
+            for block in blocks:
+                if block not in palette_ids:
+                    palette_ids[block] = len(palette)
+                    palette.append(block)
+                remap.append(palette_ids[block])
+            for i in positions:
+                ids[i] = remap[indices[(ys[i] & 15) * 256 + zs[i] * 16 + xs[i]]]
+
+        if as_ids:
+            return tuple(palette), ids
+        return [palette[i] for i in ids]
+
     def stream_blocks(self, index: int=0, section: Union[int, nbt.TAG_Compound]=None) -> Generator[Block, None, None]:
         """
         Returns a generator for all the blocks in given section
@@ -192,80 +335,207 @@ class Chunk:
         Yields
         ------
         :class:`anvil.Block`
+            The same object is yielded for all the positions of a palette entry,
+            so copy it before modifying it
+        """
+        palette, indices = self.stream_indices(section)
+        # Palette blocks are shared, there is one Block object per palette entry
+        for palette_id in indices[index:]:
+            yield palette[palette_id]
+
+    def stream_indices(self, section: Union[int, nbt.TAG_Compound]=None) -> Tuple[Tuple[Block], array.array]:
+        """
+        Returns the palette of the given section and all its blocks as palette indexes,
+        without making a :class:`Block` for each position.
+
+        The indexes are in the YZX order, the block at (x, y, z) is
+        ``palette[indices[y * 256 + z * 16 + x]]``
+
+        Parameters
+        ----------
+        section
+            Either a Y index or a section NBT tag.
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If `section` is not in the range of -4 to 19
+
+        :rtype: Tuple[Tuple[:class:`anvil.Block`], array.array]
         """
         if isinstance(section, int) and (section < -4 or section > 19):
             raise OutOfBoundsCoordinates(f'section ({section!r}) must be in range of -4 to 19')
 
-        # For better understanding of this code, read get_block()'s source
-
         if section is None or isinstance(section, int):
             section = self.get_section(section or 0)
 
-        if section is None or 'block_states' not in section:
-            air = Block.from_name('minecraft:air')
-            for i in range(4096):
-                yield air
-            return
+        tags, indices = self._section_indices(section)
+        if tags is None:
+            # If its an empty section its most likely all air
+            return (Block.from_name('minecraft:air'),), array.array('H', bytes(8192))
+        return tuple(Block.from_palette(tag) for tag in tags), indices
 
-        states = section['block_states']['data']
-        palette = section['block_states']['palette']
+    def stream_chunk(self) -> Generator[Block, None, None]:
+        """
+        Returns a generator for all the blocks in the chunk
 
-        bits = max((len(palette) - 1).bit_length(), 4)
+        This is a helper function that runs Chunk.stream_blocks from section 0 to 15
 
-        state = index // (64 // bits)
+        Yields
+        ------
+        :class:`anvil.Block`
+        """
+        for i in range(-4,20):
+            for block in self.stream_blocks(section=i):
+                yield block
 
-        data = states[state]
-        if data < 0:
-            data += 2**64
+    def stream_chunk_indices(self) -> Generator[Tuple[Tuple[Block], array.array], None, None]:
+        """
+        Returns a generator of ``(palette, indices)`` for each section of the chunk, from -4 to 19
 
-        bits_mask = 2**bits - 1
+        Refer to :class:`Chunk.stream_indices()`
+        """
+        for i in range(-4,20):
+            yield self.stream_indices(i)
 
-        offset = index % (64 // bits) * bits
+    def heightmap(self, kind: str='WORLD_SURFACE') -> array.array:
+        """
+        Returns a heightmap of the chunk, as saved by minecraft
 
-        data_len = 64 - offset
-        data >>= offset
+        Each value is the number of blocks between the bottom of the world (Y -64)
+        and the air block above the highest block of the column, so 0 for an empty column.
+        The value for (x, z) is ``heightmap[z * 16 + x]``
 
-        while index < 4096:
-            if data_len < bits:
-                state += 1
-                new_data = states[state]
-                if new_data < 0:
-                    new_data += 2**64
+        Parameters
+        ----------
+        kind
+            One of ``WORLD_SURFACE``, ``MOTION_BLOCKING``, ``MOTION_BLOCKING_NO_LEAVES``
+            or ``OCEAN_FLOOR``
 
-                data = new_data
-                data_len = 64
+        Raises
+        ------
+        anvil.DataNotAvailable
+            If the chunk does not have this heightmap
 
-            palette_id = data & bits_mask
-            yield Block.from_palette(palette[palette_id])
+        :rtype: array.array
+        """
+        heightmap = self._heightmaps.get(kind)
+        if heightmap is None:
+            if 'Heightmaps' not in self.data or kind not in self.data['Heightmaps']:
+                raise DataNotAvailable(f'Heightmap {kind} is not available')
+            # 384 blocks high worlds need 9 bits per column
+            heightmap = unpack_indices(self.data['Heightmaps'][kind], 9, 256)
+            self._heightmaps[kind] = heightmap
+        return heightmap
+
+    def surface_block(self, x: int, z: int, kind: str='WORLD_SURFACE') -> Optional[Block]:
+        """
+        Returns the highest block of the column at (x, z) according to the given heightmap,
+        reading only the section it is in. Its Y is ``chunk.heightmap(kind)[z * 16 + x] - 65``
 
-            index += 1
-            data >>= bits
-            data_len -= bits
+        Returns ``None`` if the column is empty.
 
-    def stream_chunk(self) -> Generator[Block, None, None]:
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If X or Z are not in the proper range
+        anvil.DataNotAvailable
+            If the chunk does not have this heightmap
+
+        :rtype: :class:`anvil.Block`
         """
-        Returns a generator for all the blocks in the chunk
+        if x < 0 or x > 15:
+            raise OutOfBoundsCoordinates(f'X ({x!r}) must be in range of 0 to 15')
+        if z < 0 or z > 15:
+            raise OutOfBoundsCoordinates(f'Z ({z!r}) must be in range of 0 to 15')
+        height = self.heightmap(kind)[z * 16 + x]
+        if height == 0:
+            return None
+        return self.get_block(x, height - 65, z)
 
-        This is a helper function that runs Chunk.stream_blocks from section 0 to 15
+    def get_light(self, x: int, y: int, z: int, kind: str='SkyLight') -> int:
+        """
+        Returns the light level, from 0 to 15, at given coordinates
 
-        Yields
+        Parameters
+        ----------
+        int x, y, z
+            Block's coordinates in the chunk, with Y being global
+        kind
+            Either ``SkyLight`` or ``BlockLight``.
+            Sections without this light data are considered dark.
+
+        Raises
         ------
-        :class:`anvil.Block`
+        anvil.OutOfBoundCoordidnates
+            If X, Y or Z are not in the proper range
         """
-        for i in range(-4,20):
-            for block in self.stream_blocks(section=i):
-                yield block
+        if x < 0 or x > 15:
+            raise OutOfBoundsCoordinates(f'X ({x!r}) must be in range of 0 to 15')
+        if z < 0 or z > 15:
+            raise OutOfBoundsCoordinates(f'Z ({z!r}) must be in range of 0 to 15')
+        if y < -64 or y > 319:
+            raise OutOfBoundsCoordinates(f'Y ({y!r}) must be in range of -64 to 319')
+
+        section = self._sections[(y >> 4) - MIN_SECTION_Y]
+        if section is None or kind not in section:
+            return 0
+        return nibble(section[kind].value, (y & 15) * 256 + z * 16 + x)
+
+    def light_volume(self, kind: str='SkyLight') -> bytearray:
+        """
+        Returns the light levels of the whole chunk, decoded in one go.
+
+        This is a 384x16x16 bytearray in the YZX order, the light level at (x, y, z)
+        is ``volume[(y + 64) * 256 + z * 16 + x]``
+
+        Parameters
+        ----------
+        kind
+            Either ``SkyLight`` or ``BlockLight``.
+            Sections without this light data are considered dark.
+        """
+        volume = bytearray(NUM_SECTIONS_PER_CHUNK * 4096)
+        for i, section in enumerate(self._sections):
+            if section is None or kind not in section:
+                continue
+            # Each byte holds 2 levels, the first one in the lowest 4 bits
+            data = bytes(section[kind].value)
+            volume[i * 4096:(i + 1) * 4096:2] = data.translate(_LOW_NIBBLES)
+            volume[i * 4096 + 1:(i + 1) * 4096:2] = data.translate(_HIGH_NIBBLES)
+        return volume
 
     def get_tile_entity(self, x: int, y: int, z: int) -> Optional[nbt.TAG_Compound]:
         """
         Returns the tile entity at given coordinates, or ``None`` if there isn't a tile entity
 
         To iterate through all tile entities in the chunk, use :class:`Chunk.tile_entities`
+        or :class:`Chunk.iter_tile_entities()`
+
+        Lookups go through an index made on the first call, so tile entities should be
+        changed with :class:`EditableChunk.set_tile_entity()` and
+        :class:`EditableChunk.remove_tile_entity()` rather than in the tags directly.
+        """
+        if self._tile_entity_index is None:
+            index = {}
+            for tile_entity in self.tile_entities:
+                index[tuple(tile_entity[k].value for k in 'xyz')] = tile_entity
+            self._tile_entity_index = index
+        return self._tile_entity_index.get((x, y, z))
+
+    def iter_tile_entities(self, id: str=None) -> Generator[nbt.TAG_Compound, None, None]:
+        """
+        Returns a generator of the tile entities in the chunk
+
+        Parameters
+        ----------
+        id
+            Only yield tile entities with this id, for example ``minecraft:chest``.
+            Only the ``id`` tag of the other ones is read.
         """
         for tile_entity in self.tile_entities:
-            t_x, t_y, t_z = [tile_entity[k].value for k in 'xyz']
-            if x == t_x and y == t_y and z == t_z:
-                return tile_entity
+            if id is None or tile_entity['id'].value == id:
+                yield tile_entity
 
     def get_biome(self, x: int, y: int, z: int) -> Biome:
         """
@@ -278,8 +548,8 @@ class Chunk:
         if y < -64 or y > 319:
             raise OutOfBoundsCoordinates(f'Y ({y!r}) must be in range of -64 to 319')
 
-        section = self.get_section(y // 16)
-        if 'biomes' not in section:
+        section = self._sections[(y >> 4) - MIN_SECTION_Y]
+        if section is None or 'biomes' not in section:
             raise DataNotAvailable('Biomes are not available')
         
         biomes = section['biomes']
@@ -302,10 +572,186 @@ class Chunk:
         if data < 0:
             data += 2**64
 
+        # Like block states, a biome index never spans across 2 64bit numbers,
+        # the leftover bits of each number are padding
         shifted_data = data >> (index % (64 // bits) * bits)
-        # TODO: fix here if index can span across 2 64bit numbers
 
         # get `bits` least significant bits
         # which are the palette index
         palette_id = shifted_data & 2**bits - 1
         return Biome.from_name(biomes_palette[palette_id].value)
+
+    def biome_volume(self) -> Tuple[Tuple[Optional[Biome]], bytearray]:
+        """
+        Returns the biomes of the whole chunk, decoded in one go.
+
+        Biomes are stored per 4x4x4 cells, this returns ``(palette, volume)`` where
+        ``volume`` is a 96x4x4 bytearray in the YZX order, holding the index in
+        ``palette`` of each cell. The biome at (x, y, z) is
+
+        ``palette[volume[(y + 64) // 4 * 16 + z // 4 * 4 + x // 4]]``
+
+        Cells of sections without biome data are ``None`` in the palette.
+
+        :rtype: Tuple[Tuple[:class:`anvil.Biome`], bytearray]
+        """
+        palette = []
+        palette_ids = {}
+        volume = bytearray(NUM_SECTIONS_PER_CHUNK * 64)
+        for i, section in enumerate(self._sections):
+            if section is None or 'biomes' not in section:
+                names = (None,)
+                indices = bytes(64)
+            else:
+                biomes = section['biomes']
+                names = [tag.value for tag in biomes['palette']]
+                if 'data' in biomes:
+                    bits = (len(names) - 1).bit_length()
+                    indices = bytes(unpack_indices(biomes['data'], bits, 64).tolist())
+                else:
+                    indices = bytes(64)
+
+            # Map the section palette onto the chunk palette, then remap
+            # all the cells of the section at once
+            remap = bytearray(256)
+            for j, name in enumerate(names):
+                if name not in palette_ids:
+                    palette_ids[name] = len(palette)
+                    palette.append(name)
+                remap[j] = palette_ids[name]
+            volume[i * 64:(i + 1) * 64] = indices.translate(remap)
+
+        return tuple(name and Biome.from_name(name) for name in palette), volume
+
+
+class EditableChunk(Chunk):
+    """
+    A chunk from a ``.mca`` file that can be edited, made with :class:`Chunk.edit()`
+
+    Only the sections given blocks with :class:`EditableChunk.set_block()` are decoded,
+    into a :class:`EmptySection`. Every other tag, including the biomes and
+    the other sections, is saved back as it was read.
+
+    Blocks read with :class:`EditableChunk.get_block()`, :class:`Chunk.get_blocks()`
+    and the ``stream_*`` methods include the edits that are not saved yet.
+    Heightmaps and light are those read from the file until it is saved.
+
+    Attributes
+    ----------
+    edited: Dict[:class:`int`, :class:`EmptySection`]
+        Sections that were edited, by Y index
+    """
+    __slots__ = ('edited',)
+
+    def __init__(self, nbt_data: nbt.NBTFile):
+        super().__init__(nbt_data)
+        self.edited = {}
+
+    def edit_section(self, y: int) -> EmptySection:
+        """
+        Returns the editable section at given Y index, decoding it the first time
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If Y is not in range of -4 to 19
+        """
+        section = self.edited.get(y)
+        if section is None:
+            palette, indices = self._section_indices(self.get_section(y))
+            if palette is None:
+                section = EmptySection(y)
+            else:
+                section = EmptySection.from_indices(y, [Block.from_palette(tag) for tag in palette], indices)
+            self.edited[y] = section
+        return section
+
+    def get_block(self, x: int, y: int, z: int, section: Union[int, nbt.TAG_Compound]=None) -> Block:
+        """Refer to :class:`Chunk.get_block()`, takes the edited blocks into account"""
+        if section is None and (y >> 4) in self.edited:
+            if x < 0 or x > 15 or z < 0 or z > 15:
+                raise OutOfBoundsCoordinates('X and Z must be in range of 0 to 15')
+            return self.edited[y >> 4].get_block(x, y & 15, z)
+        return super().get_block(x, y, z, section)
+
+    def stream_indices(self, section: Union[int, nbt.TAG_Compound]=None) -> Tuple[Tuple[Block], array.array]:
+        """Refer to :class:`Chunk.stream_indices()`, takes the edited blocks into account"""
+        if (section is None or isinstance(section, int)) and (section or 0) in self.edited:
+            edited = self.edited[section or 0]
+            return edited.palette(), array.array('H', edited.indices)
+        return super().stream_indices(section)
+
+    def set_block(self, block: Block, x: int, y: int, z: int):
+        """
+        Sets block at given coordinates
+
+        Parameters
+        ----------
+        int x, z
+            In range of 0 to 15
+        y
+            In range of -64 to 319
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If X, Y or Z are not in the proper range
+        """
+        if x < 0 or x > 15:
+            raise OutOfBoundsCoordinates(f'X ({x!r}) must be in range of 0 to 15')
+        if z < 0 or z > 15:
+            raise OutOfBoundsCoordinates(f'Z ({z!r}) must be in range of 0 to 15')
+        if y < -64 or y > 319:
+            raise OutOfBoundsCoordinates(f'Y ({y!r}) must be in range of -64 to 319')
+        self.edit_section(y >> 4).set_block(block, x, y & 15, z)
+
+    def set_tile_entity(self, tile_entity: nbt.TAG_Compound):
+        """
+        Adds a tile entity, replacing the one at the same coordinates if there is one
+
+        Parameters
+        ----------
+        tile_entity
+            Tile entity tag, with its ``id`` and its ``x``, ``y`` and ``z`` in world coordinates
+        """
+        self.remove_tile_entity(*(tile_entity[k].value for k in 'xyz'))
+        self.tile_entities.tags.append(tile_entity)
+        self._tile_entity_index = None
+
+    def remove_tile_entity(self, x: int, y: int, z: int):
+        """Removes the tile entity at given world coordinates if there is one"""
+        tile_entity = self.get_tile_entity(x, y, z)
+        if tile_entity is not None:
+            tags = self.tile_entities.tags
+            del tags[next(i for i, tag in enumerate(tags) if tag is tile_entity)]
+            self._tile_entity_index = None
+
+    def save(self) -> nbt.NBTFile:
+        """
+        Writes the edited sections back in the NBT data and returns it
+
+        Only the ``block_states`` tag of those sections is replaced.
+        Light is marked as outdated and the heightmaps are removed,
+        so minecraft computes them again when loading the chunk.
+        """
+        if not self.edited:
+            return self.data
+
+        for y, section in self.edited.items():
+            block_states = section.save(palette=section.palette())['block_states']
+            tag = self._sections[y - MIN_SECTION_Y]
+            if tag is None:
+                tag = nbt.TAG_Compound()
+                tag.tags.append(nbt.TAG_Byte(name='Y', value=y))
+                if 'sections' not in self.data:
+                    self.data.tags.append(nbt.TAG_List(name='sections', type=nbt.TAG_Compound))
+                self.data['sections'].tags.append(tag)
+                self._sections[y - MIN_SECTION_Y] = tag
+            tag['block_states'] = block_states
+
+        if 'isLightOn' in self.data:
+            self.data['isLightOn'].value = 0
+        if 'Heightmaps' in self.data:
+            del self.data['Heightmaps']
+        self._heightmaps.clear()
+        return self.data
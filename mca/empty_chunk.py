@@ -119,6 +119,40 @@ class EmptyChunk:
             self.add_section(section)
         section.set_block(block, x, y % 16, z)
 
+    def fill(self, block: Block, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int):
+        """
+        Fills in blocks from ``(x1, y1, z1)`` to ``(x2, y2, z2)`` in a rectangle,
+        filling each section it goes through at once with :class:`EmptySection.fill()`
+
+        Parameters
+        ----------
+        int x1, z1, x2, z2
+            In range of 0 to 15
+        int y1, y2
+            In range of -64 to 319
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If X, Y or Z are not in the proper range
+        """
+        for x in (x1, x2):
+            if x < 0 or x > 15:
+                raise OutOfBoundsCoordinates(f'X ({x!r}) must be in range of 0 to 15')
+        for z in (z1, z2):
+            if z < 0 or z > 15:
+                raise OutOfBoundsCoordinates(f'Z ({z!r}) must be in range of 0 to 15')
+        for y in (y1, y2):
+            if y < -64 or y > 319:
+                raise OutOfBoundsCoordinates(f'Y ({y!r}) must be in range of -64 to 319')
+        y1, y2 = min(y1, y2), max(y1, y2)
+
+        for sy in range(y1 // 16, y2 // 16 + 1):
+            section = self.sections[sy + 4]
+            if section is None:
+                section = EmptySection(sy)
+                self.add_section(section)
+            section.fill(block, x1, max(y1 - sy * 16, 0), z1, x2, min(y2 - sy * 16, 15), z2)
 
     def set_biome(self, biome: Biome, x: int, y: int, z: int):
         """
@@ -182,6 +216,6 @@ class EmptyChunk:
                 # So we can just skip them
                 if len(p) == 1 and p[0].name() == 'minecraft:air':
                     continue
-                sections.tags.append(s.save())
+                sections.tags.append(s.save(palette=p))
         root.tags.append(sections)
         return root
@@ -3,7 +3,6 @@ from io import BytesIO
 import zlib
 import math
 from .empty_chunk import EmptyChunk
-from .chunk import Chunk
 from .empty_section import EmptySection
 from .block import Block
 from .errors import OutOfBoundsCoordinates
@@ -181,13 +180,25 @@ class EmptyRegion:
             if not self.inside(x2, y2, z2):
                 raise OutOfBoundsCoordinates(f'Second coords ({x2}, {y2}, {z2}) is not inside this region')
 
-        for y in from_inclusive(y1, y2):
-            for z in from_inclusive(z1, z2):
-                for x in from_inclusive(x1, x2):
-                    if ignore_outside:
-                        self.set_if_inside(block, x, y, z)
-                    else:
-                        self.set_block(block, x, y, z)
+        # Keep the part of the rectangle that is inside the region
+        x1, x2 = max(min(x1, x2), self.x * 512), min(max(x1, x2), self.x * 512 + 511)
+        y1, y2 = max(min(y1, y2), -64), min(max(y1, y2), 319)
+        z1, z2 = max(min(z1, z2), self.z * 512), min(max(z1, z2), self.z * 512 + 511)
+        if x1 > x2 or y1 > y2 or z1 > z2:
+            return
+
+        # Fill chunk by chunk, each one fills its sections at once
+        for cz in range(z1 // 16, z2 // 16 + 1):
+            for cx in range(x1 // 16, x2 // 16 + 1):
+                chunk = self.get_chunk(cx, cz)
+                if chunk is None:
+                    chunk = EmptyChunk(cx, cz)
+                    self.add_chunk(chunk)
+                chunk.fill(
+                    block,
+                    max(x1 - cx * 16, 0), y1, max(z1 - cz * 16, 0),
+                    min(x2 - cx * 16, 15), y2, min(z2 - cz * 16, 15)
+                )
 
     def save(self, file: Union[str, BinaryIO, None]=None) -> bytes:
         """
@@ -208,13 +219,8 @@ class EmptyRegion:
                 chunks_data.append(None)
                 continue
             chunk_data = BytesIO()
-            if isinstance(chunk, Chunk):
-                # nbt_data = nbt.NBTFile()
-                # nbt_data.tags.append(nbt.TAG_Int(name='DataVersion', value=chunk.version))
-                # nbt_data.tags.append(chunk.data)
-                nbt_data = chunk.data
-            else:
-                nbt_data = chunk.save()
+            # Chunk.save() returns its data as is, EditableChunk.save() writes its edits first
+            nbt_data = chunk.save()
             nbt_data.write_file(buffer=chunk_data)
             chunk_data.seek(0)
             chunk_data = zlib.compress(chunk_data.read())
@@ -3,7 +3,8 @@ Create new section
 """
 from struct import Struct
 import array
-from typing import List, Tuple, Union
+import sys
+from typing import Dict, List, Sequence, Tuple, Union
 
 from .block import Block
 from .biome import Biome
@@ -23,33 +24,109 @@ def bin_append(a, b, length=None):
     return (a << length) | b
 
 
+# Lookup table shifting the lowest 4 bits of a byte to the highest ones with bytes.translate()
+_SHIFTED_NIBBLES = bytes((i << 4) & 0xFF for i in range(256))
+
+
+def pack_indices(indices, bits: int) -> array.array:
+    """
+    Packs palette indexes of ``bits`` bits each into an array of 64 bit numbers.
+    Since 1.16 an index does not span across two numbers, the leftover bits are padding.
+
+    Parameters
+    ----------
+    indices
+        Sequence of palette indexes
+    bits
+        Number of bits of each index
+    """
+    per_long = 64 // bits
+    states = array.array('Q')
+    if bits in (4, 8) and max(indices, default=0) < 256:
+        # Indexes are the bytes or half bytes of the little endian longs,
+        # so they can be merged without going through each one in python
+        data = array.array('B', indices).tobytes()
+        if bits == 4:
+            # Odd positions go to the highest 4 bits of each byte
+            low = int.from_bytes(data[0::2], 'little')
+            high = int.from_bytes(data[1::2].translate(_SHIFTED_NIBBLES), 'little')
+            data = (low | high).to_bytes((len(data) + 1) // 2, 'little')
+        # Pad the last long
+        data += bytes(-len(data) % 8)
+        states.frombytes(data)
+        if sys.byteorder == 'big':
+            states.byteswap()
+        return states
+
+    shifts = range(0, per_long * bits, bits)
+    for i in range(0, len(indices), per_long):
+        current = 0
+        for shift, index in zip(shifts, indices[i:i + per_long]):
+            current |= index << shift
+        states.append(current)
+    return states
+
+
 class EmptySection:
     """
     Used for making own sections.
 
-    This is where the blocks are actually stored, in a 16³ sized array.
-    To save up some space, ``None`` is used instead of the air block object,
-    and will be replaced with ``self.air`` when needed
+    This is where the blocks are actually stored, in a 16³ sized array
+    of indexes in the section's palette. Blocks are added to the palette
+    the first time they are set, and unused ones are removed by :class:`EmptySection.compact()`
 
     Attributes
     ----------
     y: :class:`int`
         Section's Y index
-    blocks: List[:class:`Block`]
-        1D list of blocks
+    indices: :class:`array.array`
+        1D ``array('H')`` of each block's index in the palette, in the YZX order
     air: :class:`Block`
         An air block
     """
     air = Block('minecraft', 'air')
 
-    __slots__ = ('y', 'blocks', 'biomes')
+    __slots__ = ('y', 'indices', 'biomes', '_palette', '_palette_ids', '_last')
     def __init__(self, y: int):
         self.y = y
-        # 16 * 16 * 16 = 4096 blocks
-        self.blocks: List[Union[Block, None]] = [None] * 4096
+        # 16 * 16 * 16 = 4096 blocks, all air
+        self.indices = array.array('H', bytes(2 * 4096))
+        self._palette: List[Block] = [self.air]
+        self._palette_ids: Dict[Block, int] = {self.air: 0}
+        # Last block set and its index, blocks are often set many times in a row
+        self._last: Tuple[Block, int] = (self.air, 0)
         # 4 * 4 * 4 = 64 biomes
         self.biomes: List[Union[Biome, None]] = [None] * 64
 
+    @classmethod
+    def from_indices(cls, y: int, palette: Sequence[Block], indices: array.array) -> 'EmptySection':
+        """
+        Makes a section from a palette and the 4096 indexes on it, in the order YZX
+
+        Parameters
+        ----------
+        y
+            Section's Y index
+        palette
+            Section's palette
+        indices
+            ``array('H')`` of palette indexes, used as is
+        """
+        section = cls(y)
+        section.indices = indices
+        section._palette = list(palette)
+        section._palette_ids = {}
+        for i, block in enumerate(section._palette):
+            section._palette_ids.setdefault(block, i)
+        section._last = (section._palette[0], 0)
+        return section
+
+    @property
+    def blocks(self) -> List[Block]:
+        """1D list of all the blocks, made from the palette and indexes"""
+        palette = self._palette
+        return [palette[i] for i in self.indices]
+
     @staticmethod
     def inside(x: int, y: int, z: int) -> bool:
         """
@@ -62,6 +139,23 @@ class EmptySection:
         """
         return x >= 0 and x <= 15 and y >= 0 and y <= 15 and z >= 0 and z <= 15
 
+    def palette_id(self, block: Union[Block, None]) -> int:
+        """
+        Returns the index of given block in the palette, adding it if needed.
+        ``None`` is the same as air.
+        """
+        if block is None:
+            block = self.air
+        if block is self._last[0]:
+            return self._last[1]
+        index = self._palette_ids.get(block)
+        if index is None:
+            index = len(self._palette)
+            self._palette.append(block)
+            self._palette_ids[block] = index
+        self._last = (block, index)
+        return index
+
     def set_block(self, block: Block, x: int, y: int, z: int):
         """
         Sets the block at given coordinates
@@ -81,7 +175,7 @@ class EmptySection:
         if not self.inside(x, y, z):
             raise OutOfBoundsCoordinates('X Y and Z must be in range of 0-15')
         index = y * 256 + z * 16 + x
-        self.blocks[index] = block
+        self.indices[index] = self.palette_id(block)
 
     def get_block(self, x: int, y: int, z: int) -> Block:
         """
@@ -100,19 +194,73 @@ class EmptySection:
         if not self.inside(x, y, z):
             raise OutOfBoundsCoordinates('X Y and Z must be in range of 0-15')
         index = y * 256 + z * 16 + x
-        return self.blocks[index] or self.air
+        return self._palette[self.indices[index]]
+
+    def fill(self, block: Block, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int):
+        """
+        Fills in blocks from ``(x1, y1, z1)`` to ``(x2, y2, z2)`` in a rectangle,
+        one row at a time instead of block by block.
+
+        If the whole section is covered, it is replaced by a section of only that block.
+
+        Parameters
+        ----------
+        block
+            Block to set
+        int x1, y1, z1
+            Coordinates
+        int x2, y2, z2
+            Coordinates
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If coordinates are not in range of 0-15
+        """
+        if not self.inside(x1, y1, z1) or not self.inside(x2, y2, z2):
+            raise OutOfBoundsCoordinates('X Y and Z must be in range of 0-15')
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        z1, z2 = min(z1, z2), max(z1, z2)
+
+        if block is None:
+            block = self.air
+        if (x1, y1, z1, x2, y2, z2) == (0, 0, 0, 15, 15, 15):
+            self.indices = array.array('H', bytes(2 * 4096))
+            self._palette = [block]
+            self._palette_ids = {block: 0}
+            self._last = (block, 0)
+            return
+
+        row = array.array('H', [self.palette_id(block)]) * (x2 - x1 + 1)
+        for y in range(y1, y2 + 1):
+            for z in range(z1, z2 + 1):
+                index = y * 256 + z * 16
+                self.indices[index + x1:index + x2 + 1] = row
+
+    def compact(self):
+        """
+        Removes the blocks that are not used anymore from the palette,
+        and updates the indexes accordingly.
+        """
+        used = sorted(set(self.indices))
+        if len(used) == len(self._palette):
+            return
+        remap = array.array('H', bytes(2 * len(self._palette)))
+        for new, old in enumerate(used):
+            remap[old] = new
+        self.indices = array.array('H', map(remap.__getitem__, self.indices))
+        self._palette = [self._palette[i] for i in used]
+        self._palette_ids = {block: i for i, block in enumerate(self._palette)}
+        self._last = (self._palette[0], 0)
 
     def palette(self) -> Tuple[Block]:
         """
-        Generates and returns a tuple of all the different blocks in the section
-        The order can change as it uses sets, but should be fine when saving since
-        it's only called once.
+        Returns a tuple of all the different blocks in the section,
+        in the order of the indexes. Unused blocks are removed first.
         """
-        palette = set(self.blocks)
-        if None in palette:
-            palette.remove(None)
-            palette.add(self.air)
-        return tuple(palette)
+        self.compact()
+        return tuple(self._palette)
 
     def blockstates(self, palette: Tuple[Block]=None) -> array.array:
         """
@@ -127,30 +275,14 @@ class EmptySection:
         """
         palette = palette or self.palette()
         bits = max((len(palette) - 1).bit_length(), 4)
-        states = array.array('Q')
-        current = 0
-        current_len = 0
-        for block in self.blocks:
-            if block is None:
-                index = palette.index(self.air)
-            else:
-                index = palette.index(block)
-            # since 1.16, index will not span across arrays
-            # If it's more than 64 bits then add to list and start over
-            # with the remaining bits from last one
-            if current_len + bits > 64:
-                # leftover = 64 - current_len
-                # states.append(bin_append(index & ((1 << leftover) - 1), current, length=current_len))
-                # current = index >> leftover
-                # current_len = bits - leftover
-                states.append(current)
-                current = index
-                current_len = bits
-            else:
-                current = bin_append(index, current, length=current_len)
-                current_len += bits
-        states.append(current)
-        return states
+        indices = self.indices
+        if tuple(palette) != tuple(self._palette):
+            # Another order was asked for, remap the indexes to it
+            self.compact()
+            palette_ids = {block: i for i, block in enumerate(palette)}
+            remap = [palette_ids[block] for block in self._palette]
+            indices = array.array('H', map(remap.__getitem__, self.indices))
+        return pack_indices(indices, bits)
 
     def set_biome(self, biome: Biome, x: int, y: int, z: int):
         """Sets biome"""
@@ -203,45 +335,39 @@ class EmptySection:
         states.append(current)
         return states
 
-    def save(self) -> nbt.TAG_Compound:
+    def save(self, palette: Tuple[Block]=None) -> nbt.TAG_Compound:
         """
         Saves the section to a TAG_Compound and is used inside the chunk tag
         This is missing the SkyLight tag, but minecraft still accepts it anyway
+
+        Sections of a single block are saved without the data array,
+        which minecraft also accepts.
+
+        Parameters
+        ----------
+        palette
+            Section's palette, as returned by :class:`EmptySection.palette()`.
+            If not given will generate one.
         """
         root = nbt.TAG_Compound()
         root.tags.append(nbt.TAG_Byte(name='Y', value=self.y))
 
-        palette = self.palette()
+        if palette is None:
+            palette = self.palette()
         block_states = nbt.TAG_Compound(name='block_states')
         nbt_pal = nbt.TAG_List(name='palette', type=nbt.TAG_Compound)
         for block in palette:
-            tag = nbt.TAG_Compound()
-            tag.tags.append(nbt.TAG_String(name='Name', value=block.name()))
-            if block.properties:
-                properties = nbt.TAG_Compound()
-                properties.name = 'Properties'
-                for key, value in block.properties.items():
-                    if isinstance(value, str):
-                        properties.tags.append(nbt.TAG_String(name=key, value=value))
-                    elif isinstance(value, bool):
-                        # booleans are a string saved as either 'true' or 'false'
-                        properties.tags.append(nbt.TAG_String(name=key, value=str(value).lower()))
-                    elif isinstance(value, int):
-                        # ints also seem to be saved as a string
-                        properties.tags.append(nbt.TAG_String(name=key, value=str(value)))
-                    else:
-                        # assume its a nbt tag and just append it
-                        properties.tags.append(value)
-                tag.tags.append(properties)
-            nbt_pal.tags.append(tag)
+            nbt_pal.tags.append(block.to_palette())
         # root.tags.append(nbt_pal)
-
-        states = self.blockstates(palette=palette)
-        # bstates = nbt.TAG_Long_Array(name='BlockStates')
-        bstates = nbt.TAG_Long_Array(name='data')
-        bstates.value = states.tolist()
         block_states.tags.append(nbt_pal)
-        block_states.tags.append(bstates)
+
+        # Every index would be 0, so the data array can be left out
+        if len(palette) > 1:
+            states = self.blockstates(palette=palette)
+            # bstates = nbt.TAG_Long_Array(name='BlockStates')
+            bstates = nbt.TAG_Long_Array(name='data')
+            bstates.value = states.tolist()
+            block_states.tags.append(bstates)
         root.tags.append(block_states)
 
         # biomes
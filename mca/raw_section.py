@@ -53,6 +53,6 @@ class RawSection:
         states.append(current)
         return states
 
-    def save(self) -> nbt.TAG_Compound:
+    def save(self, palette: Sequence[Block]=None) -> nbt.TAG_Compound:
         """Refer to :class:`EmptySection.save()`"""
-        return EmptySection.save(self)
+        return EmptySection.save(self, palette=palette)
@@ -1,5 +1,6 @@
-from typing import Tuple, Union, BinaryIO
+from typing import Dict, Tuple, Union, BinaryIO
 import zlib
+import time
 from io import BytesIO
 from . import nbt
 from .chunk import Chunk
@@ -100,6 +101,59 @@ class Region:
             raise ChunkNotFound(f'Could not find chunk ({chunk_x}, {chunk_z})')
         return Chunk(nbt_data)
 
+    def rewrite(self, chunks: Dict[Tuple[int, int], nbt.NBTFile], file: Union[str, BinaryIO, None]=None) -> bytes:
+        """
+        Returns the region file with the given chunks replaced.
+        The other chunks are copied as they are, without decompressing them.
+
+        Parameters
+        ----------
+        chunks
+            New NBT data of the chunks to replace, by chunk coordinates
+        file
+            Either a path or a file object, if given region
+            will be saved there.
+        """
+        chunks = {(x % 32, z % 32): data for (x, z), data in chunks.items()}
+        locations_header = bytearray(4096)
+        timestamps_header = bytearray(self.data[4096:8192])
+        now = int(time.time()).to_bytes(4, 'big')
+        # Chunks are written after the two 4KiB headers
+        body = [locations_header, timestamps_header]
+        sector = 2
+        for i in range(1024):
+            x, z = i % 32, i // 32
+            if (x, z) in chunks:
+                buffer = BytesIO()
+                chunks[x, z].write_file(buffer=buffer)
+                compressed = zlib.compress(buffer.getvalue())
+                # 4 bytes are for length, b'\x02' is the compression type which is 2 since its using zlib
+                to_add = (len(compressed) + 1).to_bytes(4, 'big') + b'\x02' + compressed
+                timestamps_header[i * 4:i * 4 + 4] = now
+            else:
+                off, sectors = self.chunk_location(x, z)
+                if (off, sectors) == (0, 0):
+                    continue
+                off *= 4096
+                length = int.from_bytes(self.data[off:off + 4], byteorder='big')
+                to_add = self.data[off:off + 4 + length]
+
+            # Padding to be a multiple of 4KiB long
+            to_add += bytes(-len(to_add) % 4096)
+            sectors = len(to_add) // 4096
+            locations_header[i * 4:i * 4 + 4] = sector.to_bytes(3, 'big') + sectors.to_bytes(1, 'big')
+            body.append(to_add)
+            sector += sectors
+
+        final = b''.join(body)
+        if file:
+            if isinstance(file, str):
+                with open(file, 'wb') as f:
+                    f.write(final)
+            else:
+                file.write(final)
+        return final
+
     @classmethod
     def from_file(cls, file: Union[str, BinaryIO]):
         """
@@ -0,0 +1,254 @@
+"""
+Structure files, the ``.nbt`` files saved by structure blocks
+ref: https://minecraft.wiki/w/Structure_file
+"""
+import array
+import gzip
+from io import BytesIO
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+from . import nbt
+from .block import Block
+from .world import World, WorldEditor
+from .empty_chunk import WORLD_VERSION
+from .errors import ChunkNotFound, OutOfBoundsCoordinates
+
+# Index of the positions that are not part of the structure
+VOID = 0xFFFF
+
+
+def _without_position(tag: nbt.TAG_Compound) -> List[nbt.TAG]:
+    """Returns the child tags of a tile entity, leaving out its coordinates"""
+    return [child for child in tag.tags if child.name not in ('x', 'y', 'z')]
+
+
+class Structure:
+    """
+    A box of blocks that can be saved to and read from a structure file,
+    to copy blocks between worlds.
+
+    Attributes
+    ----------
+    size: Tuple[:class:`int`, :class:`int`, :class:`int`]
+        Size along X, Y and Z
+    palette: List[:class:`anvil.Block`]
+        Blocks of the structure
+    blocks: :class:`array.array`
+        Index in the palette of each position in YZX order, ``VOID`` for the ones not in the structure
+    tile_entities: Dict[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`nbt.TAG_Compound`]
+        Tile entities by position in the structure, without their coordinates
+    version: :class:`int`
+        Data version of the blocks
+    """
+    __slots__ = ('size', 'palette', 'blocks', 'tile_entities', 'version')
+    def __init__(self, size: Tuple[int, int, int], version: int=WORLD_VERSION):
+        self.size = size
+        self.palette: List[Block] = []
+        self.blocks = array.array('H', [VOID]) * (size[0] * size[1] * size[2])
+        self.tile_entities: Dict[Tuple[int, int, int], nbt.TAG_Compound] = {}
+        self.version = version
+
+    @classmethod
+    def from_world(cls, world: World, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int) -> 'Structure':
+        """
+        Copies the blocks from ``(x1, y1, z1)`` to ``(x2, y2, z2)`` in a rectangle.
+        Positions in chunks that do not exist are left out.
+
+        Parameters
+        ----------
+        world
+            World to copy from
+        int x1, y1, z1
+            Coordinates
+        int x2, y2, z2
+            Coordinates
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If Y is not in range of -64 to 319
+        """
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        z1, z2 = min(z1, z2), max(z1, z2)
+        if y1 < -64 or y2 > 319:
+            raise OutOfBoundsCoordinates('Y must be in range of -64 to 319')
+        size_x, size_y, size_z = x2 - x1 + 1, y2 - y1 + 1, z2 - z1 + 1
+        structure = cls((size_x, size_y, size_z))
+
+        palette_ids = {}
+        versions = []
+        for cz in range(z1 >> 4, (z2 >> 4) + 1):
+            for cx in range(x1 >> 4, (x2 >> 4) + 1):
+                try:
+                    chunk = world.get_chunk(cx, cz)
+                except ChunkNotFound:
+                    continue
+                versions.append(chunk.version)
+
+                # Part of the box in this chunk, in world coordinates
+                bx1, bx2 = max(x1, cx * 16), min(x2, cx * 16 + 15)
+                bz1, bz2 = max(z1, cz * 16), min(z2, cz * 16 + 15)
+                xs, ys, zs = [], [], []
+                for y in range(y1, y2 + 1):
+                    for z in range(bz1, bz2 + 1):
+                        for x in range(bx1 - cx * 16, bx2 - cx * 16 + 1):
+                            xs.append(x)
+                            ys.append(y)
+                            zs.append(z - cz * 16)
+                chunk_palette, ids = chunk.get_blocks(xs, ys, zs, as_ids=True)
+
+                remap = []
+                for block in chunk_palette:
+                    if block not in palette_ids:
+                        palette_ids[block] = len(structure.palette)
+                        structure.palette.append(block)
+                    remap.append(palette_ids[block])
+
+                # Rows along X are in the same order as the coordinates
+                width = bx2 - bx1 + 1
+                i = 0
+                for y in range(size_y):
+                    for z in range(bz1 - z1, bz2 - z1 + 1):
+                        j = (y * size_z + z) * size_x + bx1 - x1
+                        structure.blocks[j:j + width] = array.array('H', map(remap.__getitem__, ids[i:i + width]))
+                        i += width
+
+                for tile_entity in chunk.tile_entities:
+                    x, y, z = (tile_entity[k].value for k in 'xyz')
+                    if bx1 <= x <= bx2 and y1 <= y <= y2 and bz1 <= z <= bz2:
+                        tag = nbt.TAG_Compound(name='nbt')
+                        tag.tags.extend(_without_position(tile_entity))
+                        structure.tile_entities[x - x1, y - y1, z - z1] = tag
+
+        if versions:
+            structure.version = max(versions)
+        return structure
+
+    @classmethod
+    def from_file(cls, file: Union[str, BinaryIO]) -> 'Structure':
+        """
+        Reads a structure file
+
+        Parameters
+        ----------
+        file
+            Either a file path or a file object
+        """
+        # Decompressed at once, reading through GzipFile goes tag by tag
+        if isinstance(file, str):
+            with open(file, 'rb') as f:
+                data = f.read()
+        else:
+            data = file.read()
+        root = nbt.NBTFile(buffer=BytesIO(gzip.decompress(data)))
+
+        version = root['DataVersion'].value if 'DataVersion' in root else WORLD_VERSION
+        structure = cls(tuple(tag.value for tag in root['size']), version)
+        # Structures with random variants have many palettes, use the first one
+        palette = root['palette'] if 'palette' in root else root['palettes'][0]
+        structure.palette = [Block.from_palette(tag) for tag in palette]
+
+        size_x, size_y, size_z = structure.size
+        for tag in root['blocks']:
+            x, y, z = (pos.value for pos in tag['pos'])
+            structure.blocks[(y * size_z + z) * size_x + x] = tag['state'].value
+            if 'nbt' in tag:
+                structure.tile_entities[x, y, z] = tag['nbt']
+        return structure
+
+    def save(self, file: Union[str, BinaryIO, None]=None) -> nbt.NBTFile:
+        """
+        Returns the structure as a :class:`nbt.NBTFile`
+
+        Parameters
+        ----------
+        file
+            Either a path or a file object, if given the structure
+            will be saved there, gzip compressed.
+        """
+        root = nbt.NBTFile()
+        root.tags.append(nbt.TAG_Int(name='DataVersion', value=self.version))
+
+        size = nbt.TAG_List(name='size', type=nbt.TAG_Int)
+        size.tags.extend(nbt.TAG_Int(value=n) for n in self.size)
+        root.tags.append(size)
+
+        palette = nbt.TAG_List(name='palette', type=nbt.TAG_Compound)
+        palette.tags.extend(block.to_palette() for block in self.palette)
+        root.tags.append(palette)
+
+        blocks = nbt.TAG_List(name='blocks', type=nbt.TAG_Compound)
+        size_x, size_y, size_z = self.size
+        i = 0
+        for y in range(size_y):
+            for z in range(size_z):
+                for x in range(size_x):
+                    state = self.blocks[i]
+                    i += 1
+                    if state == VOID:
+                        continue
+                    tag = nbt.TAG_Compound()
+                    tag.tags.append(nbt.TAG_Int(name='state', value=state))
+                    pos = nbt.TAG_List(name='pos', type=nbt.TAG_Int)
+                    pos.tags.extend((nbt.TAG_Int(value=x), nbt.TAG_Int(value=y), nbt.TAG_Int(value=z)))
+                    tag.tags.append(pos)
+                    tile_entity = self.tile_entities.get((x, y, z))
+                    if tile_entity is not None:
+                        tile_entity.name = 'nbt'
+                        tag.tags.append(tile_entity)
+                    blocks.tags.append(tag)
+        root.tags.append(blocks)
+        root.tags.append(nbt.TAG_List(name='entities', type=nbt.TAG_Compound))
+
+        if file:
+            # Rendered then compressed at once, writing through GzipFile goes tag by tag
+            buffer = BytesIO()
+            root.write_file(buffer=buffer)
+            data = gzip.compress(buffer.getvalue())
+            if isinstance(file, str):
+                with open(file, 'wb') as f:
+                    f.write(data)
+            else:
+                file.write(data)
+        return root
+
+    def paste(self, editor: WorldEditor, x: int, y: int, z: int) -> int:
+        """
+        Adds the blocks and tile entities of the structure to the edits of a :class:`anvil.WorldEditor`,
+        with its lowest corner at the given world coordinates. Call :class:`WorldEditor.apply()` to write them.
+
+        Returns the number of blocks added
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If the structure goes out of the Y range of -64 to 319
+        """
+        size_x, size_y, size_z = self.size
+        if y < -64 or y + size_y - 1 > 319:
+            raise OutOfBoundsCoordinates('Y must be in range of -64 to 319')
+
+        palette = self.palette
+        set_block = editor.set_block
+        count = 0
+        i = 0
+        for by in range(y, y + size_y):
+            for bz in range(z, z + size_z):
+                row = self.blocks[i:i + size_x]
+                i += size_x
+                for bx, state in enumerate(row, x):
+                    if state != VOID:
+                        set_block(palette[state], bx, by, bz)
+                        count += 1
+
+        for (tx, ty, tz), tag in self.tile_entities.items():
+            tile_entity = nbt.TAG_Compound()
+            tile_entity.tags.extend(_without_position(tag))
+            tile_entity.tags.extend((
+                nbt.TAG_Int(name='x', value=x + tx),
+                nbt.TAG_Int(name='y', value=y + ty),
+                nbt.TAG_Int(name='z', value=z + tz),
+            ))
+            editor.set_tile_entity(tile_entity)
+        return count
@@ -0,0 +1,176 @@
+"""
+Operations on block volumes, given as palette indexes in YZX order
+like in sections and in :class:`anvil.VolumeReader`
+"""
+import array
+from collections import Counter
+from typing import Container, List, Sequence, Tuple
+
+# (x1, y1, z1, x2, y2, z2, index), the second corner being exclusive
+Box = Tuple[int, int, int, int, int, int, int]
+
+
+def greedy_mesh(indexes: Sequence[int], size_x: int, size_y: int, size_z: int, skip: Container[int]=(0,)) -> List[Box]:
+    """
+    Merges adjacent blocks of the same index into boxes as large as possible,
+    first along X, then Z, then Y.
+
+    Parameters
+    ----------
+    indexes
+        Index of each block in YZX order, ``size_y * size_z * size_x`` long
+    int size_x, size_y, size_z
+        Size of the volume
+    skip
+        Indexes to leave out, like air
+
+    Returns a list of ``(x1, y1, z1, x2, y2, z2, index)`` boxes, the second corner being exclusive
+    """
+    if len(indexes) != size_x * size_y * size_z:
+        raise ValueError('indexes must have size_x * size_y * size_z values')
+    if not isinstance(indexes, array.array) or indexes.typecode != 'H':
+        indexes = array.array('H', indexes)
+
+    layer = size_x * size_z
+    done = bytearray(len(indexes))
+    boxes = []
+    for y in range(size_y):
+        for z in range(size_z):
+            row = y * layer + z * size_x
+            x = 0
+            while x < size_x:
+                i = row + x
+                index = indexes[i]
+                if done[i] or index in skip:
+                    x += 1
+                    continue
+
+                # Grow along X
+                x2 = x + 1
+                while x2 < size_x and not done[row + x2] and indexes[row + x2] == index:
+                    x2 += 1
+                width = x2 - x
+                full = array.array('H', [index]) * width
+                free = bytes(width)
+
+                # Grow along Z while the whole row matches
+                z2 = z + 1
+                while z2 < size_z:
+                    j = y * layer + z2 * size_x + x
+                    if indexes[j:j + width] != full or done[j:j + width] != free:
+                        break
+                    z2 += 1
+
+                # Grow along Y while the whole rectangle matches
+                y2 = y + 1
+                while y2 < size_y:
+                    fits = True
+                    for zz in range(z, z2):
+                        j = y2 * layer + zz * size_x + x
+                        if indexes[j:j + width] != full or done[j:j + width] != free:
+                            fits = False
+                            break
+                    if not fits:
+                        break
+                    y2 += 1
+
+                mark = b'\x01' * width
+                for yy in range(y, y2):
+                    for zz in range(z, z2):
+                        j = yy * layer + zz * size_x + x
+                        done[j:j + width] = mark
+                boxes.append((x, y, z, x2, y2, z2, index))
+                x = x2
+    return boxes
+
+
+def hidden_blocks(solid: bytes, size_x: int, size_y: int, size_z: int) -> bytearray:
+    """
+    Finds the blocks whose six neighbours are all solid, so they can not be seen,
+    whether they are solid themselves or not.
+
+    The whole volume is checked at once, as big integers where each block is a byte.
+    Blocks on the edges are never hidden as their neighbours are unknown,
+    pad the volume with a layer of the neighbouring blocks to check them too.
+
+    Parameters
+    ----------
+    solid
+        1 for each solid block and 0 for the others, in YZX order
+    int size_x, size_y, size_z
+        Size of the volume
+
+    Returns a bytearray with 1 for the hidden blocks and 0 for the others, in YZX order
+    """
+    length = size_x * size_y * size_z
+    if len(solid) != length:
+        raise ValueError('solid must have size_x * size_y * size_z values')
+    if min(size_x, size_y, size_z) < 3:
+        return bytearray(length)
+
+    layer = size_x * size_z
+    # Neighbours across the edges wrap around to other rows, leave the edges out
+    inner = bytearray(length)
+    row = b'\x00' + b'\x01' * (size_x - 2) + b'\x00'
+    for y in range(1, size_y - 1):
+        for z in range(1, size_z - 1):
+            i = y * layer + z * size_x
+            inner[i:i + size_x] = row
+
+    volume = int.from_bytes(solid, 'little')
+    hidden = int.from_bytes(inner, 'little')
+    # A shift by 8 bits moves the volume one block along X, rows and layers go further
+    for step in (8, 8 * size_x, 8 * layer):
+        hidden &= (volume >> step) & (volume << step)
+    return bytearray(hidden.to_bytes(length, 'little'))
+
+
+def downsample(indexes: Sequence[int], size_x: int, size_y: int, size_z: int, factor: int, skip: Container[int]=(0,)) -> array.array:
+    """
+    Shrinks a volume by ``factor`` along each axis, each cell of ``factor ** 3`` blocks
+    becomes its most common index that is not in ``skip``, or 0 if they all are.
+
+    Parameters
+    ----------
+    indexes
+        Index of each block in YZX order, ``size_y * size_z * size_x`` long
+    int size_x, size_y, size_z
+        Size of the volume, multiples of ``factor``
+    factor
+        How many blocks along each axis make a cell
+    skip
+        Indexes that do not count, like air
+
+    Returns an ``array('H')`` of the cells in YZX order
+    """
+    if len(indexes) != size_x * size_y * size_z:
+        raise ValueError('indexes must have size_x * size_y * size_z values')
+    if size_x % factor or size_y % factor or size_z % factor:
+        raise ValueError(f'Sizes must be multiples of {factor}')
+    if not isinstance(indexes, array.array) or indexes.typecode != 'H':
+        indexes = array.array('H', indexes)
+    cells = (size_x // factor) * (size_y // factor) * (size_z // factor)
+
+    # Often a section is a single block, then so is every cell
+    first = indexes[0] if len(indexes) else 0
+    if indexes.count(first) == len(indexes):
+        return array.array('H', [0 if first in skip else first]) * cells
+
+    layer = size_x * size_z
+    result = array.array('H')
+    for y in range(0, size_y, factor):
+        for z in range(0, size_z, factor):
+            # All the rows going through this line of cells
+            rows = [indexes[yy * layer + zz * size_x:yy * layer + (zz + 1) * size_x]
+                    for yy in range(y, y + factor) for zz in range(z, z + factor)]
+            for x in range(0, size_x, factor):
+                counts = Counter()
+                for row in rows:
+                    counts.update(row[x:x + factor])
+                best = 0
+                for index, count in counts.most_common():
+                    if index not in skip:
+                        best = index
+                        break
+                result.append(best)
+    return result
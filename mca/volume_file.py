@@ -0,0 +1,182 @@
+"""
+Binary volume file, to export blocks chunk by chunk
+
+A file is ``MAGIC`` followed by one record per chunk and scale:
+
+- header, see ``RECORD_HEADER``: chunk X, chunk Z, lowest Y, height in layers, scale,
+  palette length in bytes, flags and index data length in bytes
+- palette, block names in UTF-8 separated by ``\\n``. An empty name means ``None``
+- index data, ``height * (16 // scale) ** 2`` little endian unsigned shorts in YZX order, zlib compressed if flagged
+
+The scale is how many blocks along each axis one value stands for, 1 for the blocks themselves
+and more for downsampled levels, so one file can hold a pyramid of levels.
+"""
+import sys
+import mmap
+import zlib
+import array
+from struct import Struct
+from typing import BinaryIO, Dict, Generator, Optional, Sequence, Tuple, Union
+
+MAGIC = b'MCAVOL2\x00'
+# x, z, min_y, height, scale, palette length, flags, data length
+RECORD_HEADER = Struct('<iiiiBIBI')
+SCALES = (1, 2, 4, 8, 16)
+FLAG_ZLIB = 1
+
+
+class VolumeWriter:
+    """
+    Writes chunk volumes to a file as they are given, so only one is kept in memory
+
+    Attributes
+    ----------
+    file: BinaryIO
+        File being written
+    compress: :class:`bool`
+        Whether the index data is zlib compressed
+    """
+    __slots__ = ('file', 'compress', '_close')
+    def __init__(self, file: Union[str, BinaryIO], compress: bool=True):
+        """
+        Parameters
+        ----------
+        file
+            Either a path or a file object, which is not closed by :class:`VolumeWriter.close()`
+        compress
+            Whether to zlib compress the index data
+        """
+        self._close = isinstance(file, str)
+        self.file = open(file, 'wb') if self._close else file
+        self.compress = compress
+        self.file.write(MAGIC)
+
+    def write(self, x: int, z: int, min_y: int, palette: Sequence[Optional[str]], indexes: Sequence[int], scale: int=1):
+        """
+        Writes the volume of a chunk at a scale
+
+        Parameters
+        ----------
+        int x, z
+            Chunk coordinates
+        min_y
+            Y of the first layer
+        palette
+            Block names, ``None`` for missing blocks
+        indexes
+            Index in the palette of each value in YZX order, in whole layers
+        scale
+            Blocks along each axis for one value, one of 1, 2, 4, 8 or 16
+        """
+        if scale not in SCALES:
+            raise ValueError(f'scale must be one of {SCALES}')
+        layer = (16 // scale) ** 2
+        if len(indexes) % layer:
+            raise ValueError(f'Indexes must be whole {16 // scale}x{16 // scale} layers')
+        if not isinstance(indexes, array.array) or indexes.typecode != 'H':
+            indexes = array.array('H', indexes)
+        if sys.byteorder == 'big':
+            indexes = array.array('H', indexes)
+            indexes.byteswap()
+        data = indexes.tobytes()
+        flags = 0
+        if self.compress:
+            data = zlib.compress(data)
+            flags |= FLAG_ZLIB
+        names = '\n'.join(name or '' for name in palette).encode('utf-8')
+        self.file.write(RECORD_HEADER.pack(x, z, min_y, len(indexes) // layer, scale, len(names), flags, len(data)))
+        self.file.write(names)
+        self.file.write(data)
+
+    def close(self):
+        """Closes the file if it was opened from a path"""
+        if self._close:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class VolumeReader:
+    """
+    Reads a volume file through a memory map.
+    Only the record headers are read when opening, a volume is decoded when asked for.
+
+    Attributes
+    ----------
+    records: Dict[Tuple[:class:`int`, :class:`int`, :class:`int`], Tuple[:class:`int`, :class:`int`, :class:`int`, :class:`int`, :class:`int`, :class:`int`, :class:`int`]]
+        ``(min_y, height, palette offset, palette length, flags, data offset, data length)`` by chunk coordinates and scale
+    """
+    __slots__ = ('_file', '_map', 'records')
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'{path!r} is not a volume file')
+
+        self.records: Dict[Tuple[int, int, int], Tuple[int, int, int, int, int, int, int]] = {}
+        offset = len(MAGIC)
+        while offset < len(self._map):
+            x, z, min_y, height, scale, palette_len, flags, data_len = RECORD_HEADER.unpack_from(self._map, offset)
+            offset += RECORD_HEADER.size
+            self.records[x, z, scale] = (min_y, height, offset, palette_len, flags, offset + palette_len, data_len)
+            offset += palette_len + data_len
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, coords: Tuple[int, ...]) -> bool:
+        """Whether the file has the chunk at ``(x, z)`` or at ``(x, z, scale)``"""
+        if len(coords) == 2:
+            coords += (1,)
+        return coords in self.records
+
+    def scales(self) -> Tuple[int]:
+        """Returns the scales in the file"""
+        return tuple(sorted({scale for x, z, scale in self.records}))
+
+    def get(self, x: int, z: int, scale: int=1) -> Tuple[int, Tuple[Optional[str]], array.array]:
+        """
+        Returns ``(min_y, palette, indexes)`` of the chunk at given coordinates and scale,
+        with the same values given to :class:`VolumeWriter.write()` and indexes as an ``array('H')``
+
+        Raises
+        ------
+        KeyError
+            If the chunk is not in the file
+        """
+        min_y, height, palette_off, palette_len, flags, data_off, data_len = self.records[x, z, scale]
+        names = self._map[palette_off:palette_off + palette_len].decode('utf-8')
+        palette = tuple(name or None for name in names.split('\n'))
+        data = self._map[data_off:data_off + data_len]
+        if flags & FLAG_ZLIB:
+            data = zlib.decompress(data)
+        indexes = array.array('H')
+        indexes.frombytes(data)
+        if sys.byteorder == 'big':
+            indexes.byteswap()
+        return min_y, palette, indexes
+
+    def iter_scale(self, scale: int) -> Generator[Tuple[int, int, int, Tuple[Optional[str]], array.array], None, None]:
+        """Yields ``(x, z, min_y, palette, indexes)`` for every chunk at a scale, in the order they were written"""
+        for x, z, record_scale in self.records:
+            if record_scale == scale:
+                yield (x, z) + self.get(x, z, scale)
+
+    def __iter__(self) -> Generator[Tuple[int, int, int, Tuple[Optional[str]], array.array], None, None]:
+        """Same as ``iter_scale(1)``, the chunk blocks themselves"""
+        return self.iter_scale(1)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,277 @@
+"""
+World folder
+ref: https://minecraft.wiki/w/Java_Edition_level_format
+"""
+import os
+import time
+import array
+from typing import Dict, Iterable, List, Tuple, Sequence
+
+from .region import Region
+from .chunk import Chunk
+from .block import Block
+from . import nbt
+from .errors import ChunkNotFound, OutOfBoundsCoordinates
+
+
+class World:
+    """
+    Read access to the region files of a world folder using world coordinates.
+
+    Region files are only read when first needed, and are then kept in ``regions``.
+
+    Attributes
+    ----------
+    folder: :class:`str`
+        Path of the world folder, the one containing ``level.dat``
+    regions: Dict[Tuple[:class:`int`, :class:`int`], :class:`anvil.Region`]
+        Regions already read, by region coordinates
+    """
+    __slots__ = ('folder', 'regions')
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.regions: Dict[Tuple[int, int], Region] = {}
+
+    def region_path(self, region_x: int, region_z: int) -> str:
+        """Returns the path of the ``.mca`` file of the region at given region coordinates"""
+        return os.path.join(self.folder, 'region', f'r.{region_x}.{region_z}.mca')
+
+    def get_region(self, region_x: int, region_z: int) -> Region:
+        """
+        Returns the region at given region coordinates
+
+        Raises
+        ------
+        FileNotFoundError
+            If the region file does not exist
+        """
+        region = self.regions.get((region_x, region_z))
+        if region is None:
+            region = Region.from_file(self.region_path(region_x, region_z))
+            self.regions[region_x, region_z] = region
+        return region
+
+    def get_chunk(self, chunk_x: int, chunk_z: int) -> Chunk:
+        """
+        Returns the chunk at given chunk coordinates
+
+        Raises
+        ------
+        anvil.ChunkNotFound
+            If the chunk or its region file does not exist
+        """
+        try:
+            region = self.get_region(chunk_x >> 5, chunk_z >> 5)
+        except FileNotFoundError:
+            raise ChunkNotFound(f'Could not find region of chunk ({chunk_x}, {chunk_z})')
+        return region.get_chunk(chunk_x, chunk_z)
+
+    def get_block(self, x: int, y: int, z: int):
+        """
+        Returns the block at given world coordinates
+
+        :rtype: :class:`anvil.Block`
+        """
+        return self.get_chunk(x >> 4, z >> 4).get_block(x & 15, y, z & 15)
+
+    def get_blocks(self, xs: Sequence[int], ys: Sequence[int], zs: Sequence[int], as_ids: bool=False):
+        """
+        Returns the blocks at many world coordinates at once, in the same order as the coordinates.
+        Refer to :class:`Chunk.get_blocks()`
+
+        Each chunk is read once, and each section decoded once.
+
+        Raises
+        ------
+        anvil.ChunkNotFound
+            If one of the coordinates is in a chunk that does not exist
+        anvil.OutOfBoundCoordidnates
+            If Y is not in range of -64 to 319
+        """
+        if not len(xs) == len(ys) == len(zs):
+            raise ValueError('xs, ys and zs must have the same length')
+        if len(ys) and (min(ys) < -64 or max(ys) > 319):
+            raise OutOfBoundsCoordinates('Y must be in range of -64 to 319')
+
+        # Position in the input of each coordinate, by chunk
+        groups = {}
+        for i, (x, z) in enumerate(zip(xs, zs)):
+            groups.setdefault((x >> 4, z >> 4), []).append(i)
+
+        palette = []
+        palette_ids = {}
+        ids = array.array('H', bytes(2 * len(xs)))
+        for (cx, cz), positions in groups.items():
+            chunk = self.get_chunk(cx, cz)
+            chunk_palette, chunk_ids = chunk.get_blocks(
+                [xs[i] & 15 for i in positions],
+                [ys[i] for i in positions],
+                [zs[i] & 15 for i in positions],
+                as_ids=True
+            )
+            remap = []
+            for block in chunk_palette:
+                if block not in palette_ids:
+                    palette_ids[block] = len(palette)
+                    palette.append(block)
+                remap.append(palette_ids[block])
+            for i, block_id in zip(positions, chunk_ids):
+                ids[i] = remap[block_id]
+
+        if as_ids:
+            return tuple(palette), ids
+        return [palette[i] for i in ids]
+
+
+class EditReport:
+    """
+    What :class:`WorldEditor.apply()` did
+
+    Attributes
+    ----------
+    edits: :class:`int`
+        Number of blocks set
+    skipped: :class:`int`
+        Number of blocks not set because their chunk or region does not exist
+    chunks: :class:`int`
+        Number of chunks written
+    regions: :class:`int`
+        Number of region files written
+    seconds: :class:`float`
+        Time it took
+    """
+    __slots__ = ('edits', 'skipped', 'chunks', 'regions', 'seconds')
+    def __init__(self, edits: int, skipped: int, chunks: int, regions: int, seconds: float):
+        self.edits = edits
+        self.skipped = skipped
+        self.chunks = chunks
+        self.regions = regions
+        self.seconds = seconds
+
+    @property
+    def edits_per_second(self) -> float:
+        """Blocks set per second"""
+        return self.edits / self.seconds if self.seconds else float(self.edits)
+
+    def __repr__(self):
+        return (f'EditReport({self.edits} edits, {self.skipped} skipped, {self.chunks} chunks, '
+                f'{self.regions} regions, {self.edits_per_second:.0f} edits/s)')
+
+
+class WorldEditor:
+    """
+    Sets blocks of a world folder in bulk.
+
+    Edits are only stored until :class:`WorldEditor.apply()`, which loads each
+    region once, decodes only the sections that are edited, see :class:`Chunk.edit()`,
+    and writes only the chunks that changed.
+
+    Attributes
+    ----------
+    world: :class:`anvil.World`
+        World being edited
+    edits: Dict[Tuple[:class:`int`, :class:`int`], List[Tuple[:class:`anvil.Block`, :class:`int`, :class:`int`, :class:`int`]]]
+        Edits not applied yet by chunk coordinates, as ``(block, x, y, z)`` with X and Z inside the chunk
+    tile_entities: Dict[Tuple[:class:`int`, :class:`int`], List[:class:`nbt.TAG_Compound`]]
+        Tile entities not added yet by chunk coordinates
+    """
+    __slots__ = ('world', 'edits', 'tile_entities')
+    def __init__(self, folder: str):
+        self.world = World(folder)
+        self.edits: Dict[Tuple[int, int], List[Tuple[Block, int, int, int]]] = {}
+        self.tile_entities: Dict[Tuple[int, int], List[nbt.TAG_Compound]] = {}
+
+    def set_block(self, block: Block, x: int, y: int, z: int):
+        """
+        Sets the block at given world coordinates when the edits are applied
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If Y is not in range of -64 to 319
+        """
+        if y < -64 or y > 319:
+            raise OutOfBoundsCoordinates(f'Y ({y!r}) must be in range of -64 to 319')
+        chunk_edits = self.edits.get((x >> 4, z >> 4))
+        if chunk_edits is None:
+            chunk_edits = self.edits[x >> 4, z >> 4] = []
+        chunk_edits.append((block, x & 15, y, z & 15))
+
+    def set_blocks(self, edits: Iterable[Tuple[Block, int, int, int]]):
+        """
+        Same as :class:`WorldEditor.set_block()` for many ``(block, x, y, z)`` edits
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If a Y is not in range of -64 to 319
+        """
+        set_block = self.set_block
+        for block, x, y, z in edits:
+            set_block(block, x, y, z)
+
+    def set_tile_entity(self, tile_entity: nbt.TAG_Compound):
+        """
+        Adds a tile entity when the edits are applied, replacing the one at the same coordinates.
+        Refer to :class:`EditableChunk.set_tile_entity()`
+        """
+        x, z = tile_entity['x'].value, tile_entity['z'].value
+        self.tile_entities.setdefault((x >> 4, z >> 4), []).append(tile_entity)
+
+    def apply(self) -> EditReport:
+        """
+        Writes all the edits to the region files, in the order they were given.
+        Edits in chunks or regions that do not exist are skipped.
+
+        The tile entities of the blocks that are replaced are removed,
+        then the ones given with :class:`WorldEditor.set_tile_entity()` are added.
+        """
+        start = time.perf_counter()
+        done = skipped = chunk_count = region_count = 0
+
+        regions = {}
+        for cx, cz in set(self.edits) | set(self.tile_entities):
+            regions.setdefault((cx >> 5, cz >> 5), {})[cx, cz] = self.edits.get((cx, cz), [])
+
+        for (rx, rz), chunks in regions.items():
+            try:
+                region = self.world.get_region(rx, rz)
+            except FileNotFoundError:
+                skipped += sum(map(len, chunks.values()))
+                continue
+
+            changed = {}
+            for (cx, cz), chunk_edits in chunks.items():
+                try:
+                    chunk = region.get_chunk(cx, cz).edit()
+                except ChunkNotFound:
+                    skipped += len(chunk_edits)
+                    continue
+
+                # Group by section so each one is only looked up once
+                sections = {}
+                for block, x, y, z in chunk_edits:
+                    sections.setdefault(y >> 4, []).append((block, x, y & 15, z))
+                for y, section_edits in sections.items():
+                    set_block = chunk.edit_section(y).set_block
+                    for block, x, y, z in section_edits:
+                        set_block(block, x, y, z)
+
+                if len(chunk.tile_entities):
+                    for block, x, y, z in chunk_edits:
+                        chunk.remove_tile_entity(cx * 16 + x, y, cz * 16 + z)
+                for tile_entity in self.tile_entities.get((cx, cz), ()):
+                    chunk.set_tile_entity(tile_entity)
+
+                changed[cx, cz] = chunk.save()
+                done += len(chunk_edits)
+
+            if changed:
+                data = region.rewrite(changed, self.world.region_path(rx, rz))
+                self.world.regions[rx, rz] = Region(data)
+                chunk_count += len(changed)
+                region_count += 1
+
+        self.edits.clear()
+        self.tile_entities.clear()
+        return EditReport(done, skipped, chunk_count, region_count, time.perf_counter() - start)
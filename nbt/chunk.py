@@ -10,6 +10,9 @@ from struct import pack
 from math import ceil
 import array
 
+# Packed block states since 1.16, decoded by the same function as the mca package
+from mca.chunk import unpack_indices as unpack_padded
+
 
 # Legacy numeric block identifiers
 # mapped to alpha identifiers in best effort
@@ -130,10 +133,15 @@ class McRegionChunk(Chunk):
         return name
 
     def iter_block(self):
+        blocks = self.blocks.blocksList
+        names = {}
         for y in range(0, 128):
             for z in range(0, 16):
-                for x in range(0, 16):
-                    yield self.get_block(x, y, z)
+                # the 16 blocks of a row along X are 128*16 bytes apart
+                for bid in blocks[y + z*128::128*16]:
+                    if bid not in names:
+                        names[bid] = block_id_to_name(bid)
+                    yield names[bid]
 
 
 # Section in Anvil new format
@@ -142,7 +150,7 @@ class AnvilSection(object):
 
     def __init__(self, nbt, version):
         self.names = []
-        self.indexes = []
+        self.indexes = array.array('H')
 
         # Is the section flattened ?
         # See https://minecraft.gamepedia.com/1.13/Flattening
@@ -169,13 +177,11 @@ class AnvilSection(object):
     # Contains an array of block numeric identifiers
 
     def _init_array(self, nbt):
-        bids = []
+        bids = {}
         for bid in nbt['Blocks'].value:
-            try:
-                i = bids.index(bid)
-            except ValueError:
-                bids.append(bid)
-                i = len(bids) - 1
+            i = bids.get(bid)
+            if i is None:
+                i = bids[bid] = len(bids)
             self.indexes.append(i)
 
         for bid in bids:
@@ -239,29 +245,20 @@ class AnvilSection(object):
             name = p['Name'].value
             self.names.append(name)
 
+        # 1.18+ sections of a single block state have no data array,
+        # every block is the first of the palette
+        if nbt['BlockStates'] is None:
+            self.indexes = array.array('H', bytes(8192))
+            return
+
         states = nbt['BlockStates'].value
         num_bits = (len(self.names) - 1).bit_length()
         if num_bits < 4: num_bits = 4
-        mask = 2**num_bits - 1
-        
+
         indexes_per_element = 64 // num_bits
-        last_state_elements = 4096 % indexes_per_element
-        if last_state_elements == 0: last_state_elements = indexes_per_element
-        
         assert len(states) == ceil(4096 / indexes_per_element)
 
-        for i in range(len(states)-1):
-            long = states[i]
-            
-            for _ in range(indexes_per_element):
-                self.indexes.append(long & mask)
-                long = long >> num_bits
-
-        
-        long = states[-1]
-        for _ in range(last_state_elements):
-            self.indexes.append(long & mask)
-            long = long >> num_bits
+        self.indexes = unpack_padded(states, num_bits)
 
 
     def get_block(self, x, y, z):
@@ -272,9 +269,55 @@ class AnvilSection(object):
 
 
     def iter_block(self):
-        for i in range(0, 4096):
-            p = self.indexes[i]
-            yield self.names[p]
+        names = self.names
+        for p in self.indexes:
+            yield names[p]
+
+
+# Helpers shared by AnvilChunk and the world-wide searches
+
+def get_data_version(nbt):
+    """Return the DataVersion of a chunk NBT, 0 for the first Anvil versions."""
+
+    # Started to work on this class with MC version 1.13.2
+    # so with the chunk data version 1631
+    # Backported to first Anvil version (= 0) from examples
+    # Could work with other versions, but has to be tested first
+
+    try:
+        version = nbt['DataVersion'].value
+        if version != 1343 and not (version >= 1631 or version <= 3953):
+            raise NotImplementedError('DataVersion %d not implemented' % (version,))
+    except KeyError:
+        version = 0
+    return version
+
+
+def iter_section_tags(nbt):
+    """
+    Yield (y, palette, states) for every section of an Anvil chunk NBT
+    that holds block data, without decoding anything.
+
+    palette is the raw palette tag list and states the packed long array.
+    states is None for 1.18+ sections made of a single block state,
+    which are saved with a one entry palette and no data array.
+    """
+    if 'Sections' in nbt:
+        for s in nbt['Sections']:
+            if "BlockStates" in s.keys(): # sections may only contain lighting information
+                yield s['Y'].value, s['Palette'], s['BlockStates']
+
+    # byETO
+    elif 'sections' in nbt:
+        for s in nbt['sections']:
+            if "block_states" not in s.keys():
+                continue
+            block_states = s["block_states"]
+            if "data" in block_states.keys():
+                yield s['Y'].value, block_states['palette'], block_states['data']
+            else:
+                yield s['Y'].value, block_states['palette'], None
+    # byETO
 
 
 # Chunck in Anvil new format
@@ -284,49 +327,66 @@ class AnvilChunk(Chunk):
     def __init__(self, nbt):
         Chunk.__init__(self, nbt)
 
-        # Started to work on this class with MC version 1.13.2
-        # so with the chunk data version 1631
-        # Backported to first Anvil version (= 0) from examples
-        # Could work with other versions, but has to be tested first
+        self.version = get_data_version(nbt)
 
-        try:
-            version = nbt['DataVersion'].value
-            if version != 1343 and not (version >= 1631 or version <= 3953):
-                raise NotImplementedError('DataVersion %d not implemented' % (version,))
-        except KeyError:
-            version = 0
+        # Only locate the sections here, they are decoded
+        # on first access by get_section()
 
-        # Load all sections
+        self._section_tags = {}
+        self._sections = {}
+        for y, palette, states in iter_section_tags(self.chunk_data):
+            self._section_tags[y] = {'Palette': palette, 'BlockStates': states}
 
-        self.sections = {}
-        if 'Sections' in self.chunk_data:
-            for s in self.chunk_data['Sections']:
-                if "BlockStates" in s.keys(): # sections may only contain lighting information
-                    self.sections[s['Y'].value] = AnvilSection(s, version)
-
-        # byETO
-        elif 'sections' in self.chunk_data:
-            for s in self.chunk_data['sections']:
-                if "data" in s["block_states"].keys():
-                    a = {'Palette': s["block_states"]['palette'], 'BlockStates': s["block_states"]['data']}
-                    self.sections[s['Y'].value] = AnvilSection(a, version)
-        # byETO
+    @property
+    def sections(self):
+        """Dict of all the sections keyed by Y index. This decodes every section."""
+        return {y: self.get_section(y) for y in self._section_tags}
 
     def get_section(self, y):
         """Get a section from Y index."""
-        if y in self.sections:
-            return self.sections[y]
-
-        return None
+        section = self._sections.get(y)
+        if section is None and y in self._section_tags:
+            section = AnvilSection(self._section_tags[y], self.version)
+            self._sections[y] = section
+        return section
 
 
     def get_max_height(self):
         ymax = 0
-        for y in self.sections.keys():
+        for y in self._section_tags.keys():
             if y > ymax: ymax = y
         return ymax * 16 + 15
 
 
+    def get_heightmap(self, kind='WORLD_SURFACE'):
+        """
+        Return a heightmap as saved in the chunk, as an array of 256 values
+        indexed by z*16 + x. Each value is the height above the bottom of the world
+        of the air block above the highest block in the column, the bottom being
+        Y 0 for MC 1.16 and 1.17 and Y -64 since MC 1.18.
+        kind is one of WORLD_SURFACE, MOTION_BLOCKING, MOTION_BLOCKING_NO_LEAVES or OCEAN_FLOOR.
+        Return None if the chunk does not contain that heightmap.
+        """
+        if 'Heightmaps' not in self.chunk_data or kind not in self.chunk_data['Heightmaps']:
+            return None
+        if self.version < 2566: # before MC 1.16.0 the values are not padded
+            raise NotImplementedError('DataVersion %d not implemented' % (self.version,))
+        # 9 bits are needed for the 384 blocks high worlds, and used since 1.16
+        return unpack_padded(self.chunk_data['Heightmaps'][kind].value, 9, 256)
+
+    def get_surface_block(self, x, z, kind='WORLD_SURFACE'):
+        """
+        Get the highest block of the column x,z from the heightmap, decoding only its section.
+        Return None if the column is empty or if the chunk has no such heightmap.
+        Same versions as get_heightmap().
+        """
+        heightmap = self.get_heightmap(kind)
+        if heightmap is None or heightmap[z*16 + x] == 0:
+            return None
+        # The heights start from the bottom of the world, Y -64 since MC 1.18
+        bottom = -64 if self.version >= 2860 else 0
+        return self.get_block(x, heightmap[z*16 + x] - 1 + bottom, z)
+
     def get_block(self, x, y, z):
         """Get a block from relative x,y,z."""
         sy,by = divmod(y, 16)
@@ -337,42 +397,75 @@ class AnvilChunk(Chunk):
         return section.get_block(x, by, z)
 
 
+    def get_slab(self, y_range):
+        """
+        Get the blocks of every Y of y_range at once, decoding each section once.
+        Return (names, indexes): the block names, and an array of len(y_range) * 256
+        indexes in names, in YZX order like the sections. Blocks of missing sections
+        are None in names, like with get_block().
+        """
+        names = []
+        ids = {}
+        indexes = array.array('H')
+        remaps = {}
+        for y in y_range:
+            sy, by = divmod(y, 16)
+            if sy not in remaps:
+                section = self.get_section(sy)
+                section_names = [None] if section is None else section.names
+                remap = []
+                for name in section_names:
+                    if name not in ids:
+                        ids[name] = len(names)
+                        names.append(name)
+                    remap.append(ids[name])
+                remaps[sy] = (section, remap)
+            section, remap = remaps[sy]
+            if section is None:
+                indexes.extend(array.array('H', remap) * 256)
+            elif remap == list(range(len(remap))):
+                indexes.extend(section.indexes[by*256:(by + 1)*256])
+            else:
+                indexes.extend(map(remap.__getitem__, section.indexes[by*256:(by + 1)*256]))
+        return names, indexes
+
+
     def iter_block(self):
-        for s in self.sections.values():
-            for b in s.iter_block():
+        for y in self._section_tags:
+            for b in self.get_section(y).iter_block():
                 yield b
 
 
 class BlockArray(object):
-    """Convenience class for dealing with a Block/data byte array."""
+    """
+    Convenience class for dealing with a Block/data byte array.
+    The blocks are kept in a bytearray of 32768 block ids, and the data in
+    a bytearray of 16384 bytes holding two 4-bit values each.
+    """
+
+    # Lookup table for bytes.translate(): 1 for solid blocks, 0 for the others
+    _solid_table = bytes(0 if i in (0, 8, 9, 10, 11, 38, 37, 32, 31) else 1 for i in range(256))
+
+    # (x, y, z) of each offset, made on first use of get_blocks_struct()
+    _coords = None
+
     def __init__(self, blocksBytes=None, dataBytes=None):
         """Create a new BlockArray, defaulting to no block or data bytes."""
         if isinstance(blocksBytes, (bytearray, array.array)):
-            self.blocksList = list(blocksBytes)
+            self.blocksList = bytearray(blocksBytes)
         else:
-            self.blocksList = [0]*32768 # Create an empty block list (32768 entries of zero (air))
+            self.blocksList = bytearray(32768) # Create an empty block list (32768 entries of zero (air))
 
         if isinstance(dataBytes, (bytearray, array.array)):
-            self.dataList = list(dataBytes)
+            self.dataList = bytearray(dataBytes)
         else:
-            self.dataList = [0]*16384 # Create an empty data list (32768 4-bit entries of zero make 16384 byte entries)
+            self.dataList = bytearray(16384) # Create an empty data list (32768 4-bit entries of zero make 16384 byte entries)
 
     def get_blocks_struct(self):
         """Return a dictionary with block ids keyed to (x, y, z)."""
-        cur_x = 0
-        cur_y = 0
-        cur_z = 0
-        blocks = {}
-        for block_id in self.blocksList:
-            blocks[(cur_x,cur_y,cur_z)] = block_id
-            cur_y += 1
-            if (cur_y > 127):
-                cur_y = 0
-                cur_z += 1
-                if (cur_z > 15):
-                    cur_z = 0
-                    cur_x += 1
-        return blocks
+        if BlockArray._coords is None:
+            BlockArray._coords = tuple((x,y,z) for x in range(16) for z in range(16) for y in range(128))
+        return dict(zip(BlockArray._coords, self.blocksList))
 
     # Give blockList back as a byte array
     def get_blocks_byte_array(self, buffer=False):
@@ -381,7 +474,7 @@ class BlockArray(object):
             length = len(self.blocksList)
             return BytesIO(pack(">i", length)+self.get_blocks_byte_array())
         else:
-            return array.array('B', self.blocksList).tostring()
+            return bytes(self.blocksList)
 
     def get_data_byte_array(self, buffer=False):
         """Return a list of data for all blocks in this chunk."""
@@ -389,26 +482,36 @@ class BlockArray(object):
             length = len(self.dataList)
             return BytesIO(pack(">i", length)+self.get_data_byte_array())
         else:
-            return array.array('B', self.dataList).tostring()
+            return bytes(self.dataList)
+
+    # Low and high 4 bits of each byte value, for bytes.translate()
+    _LOW_NIBBLES = bytes(i & 0x0F for i in range(256))
+    _HIGH_NIBBLES = bytes(i >> 4 for i in range(256))
+
+    def get_data_array(self):
+        """Return a bytearray with the 4-bit data value of each block, in the same order as the blocks."""
+        data = bytearray(32768)
+        # The first value of each byte is in the lower bits
+        data[0::2] = self.dataList.translate(self._LOW_NIBBLES)
+        data[1::2] = self.dataList.translate(self._HIGH_NIBBLES)
+        return data
 
     def generate_heightmap(self, buffer=False, as_array=False):
         """Return a heightmap, representing the highest solid blocks in this chunk."""
-        non_solids = [0, 8, 9, 10, 11, 38, 37, 32, 31]
         if buffer:
             return BytesIO(pack(">i", 256)+self.generate_heightmap()) # Length + Heightmap, ready for insertion into Chunk NBT
         else:
+            # Columns are 128 consecutive bytes, mark the solid blocks and find the last one
+            solids = self.blocksList.translate(self._solid_table)
             bytes = []
             for z in range(16):
                 for x in range(16):
-                    for y in range(127, -1, -1):
-                        offset = y + z*128 + x*128*16
-                        if (self.blocksList[offset] not in non_solids or y == 0):
-                            bytes.append(y+1)
-                            break
+                    offset = z*128 + x*128*16
+                    bytes.append(max(solids.rfind(1, offset, offset + 128) - offset, 0) + 1)
             if (as_array):
                 return bytes
             else:
-                return array.array('B', bytes).tostring()
+                return array.array('B', bytes).tobytes()
 
     def set_blocks(self, list=None, dict=None, fill_air=False):
         """
@@ -417,23 +520,14 @@ class BlockArray(object):
         """
         if list:
             # Inputting a list like self.blocksList
-            self.blocksList = list
+            self.blocksList = bytearray(list)
         elif dict:
             # Inputting a dictionary like result of self.get_blocks_struct()
-            list = []
-            for x in range(16):
-                for z in range(16):
-                    for y in range(128):
-                        coord = x,y,z
-                        offset = y + z*128 + x*128*16
-                        if (coord in dict):
-                            list.append(dict[coord])
-                        else:
-                            if (self.blocksList[offset] and not fill_air):
-                                list.append(self.blocksList[offset])
-                            else:
-                                list.append(0) # Air
-            self.blocksList = list
+            blocks = bytearray(32768) if fill_air else bytearray(self.blocksList)
+            for (x,y,z), id in dict.items():
+                if 0 <= x < 16 and 0 <= y < 128 and 0 <= z < 16:
+                    blocks[y + z*128 + x*128*16] = id
+            self.blocksList = blocks
         else:
             # None of the above...
             return False
@@ -443,16 +537,14 @@ class BlockArray(object):
         """Sets the block a x, y, z to the specified id, and optionally data."""
         offset = y + z*128 + x*128*16
         self.blocksList[offset] = id
+        index = offset // 2
+        b = self.dataList[index]
         if (offset % 2 == 1):
             # offset is odd
-            index = (offset-1)//2
-            b = self.dataList[index]
-            self.dataList[index] = (b & 240) + (data & 15) # modify lower bits, leaving higher bits in place
+            self.dataList[index] = (b & 15) + (data << 4 & 240) # modify higher bits, leaving lower bits in place
         else:
             # offset is even
-            index = offset//2
-            b = self.dataList[index]
-            self.dataList[index] = (b & 15) + (data << 4 & 240) # modify ligher bits, leaving lower bits in place
+            self.dataList[index] = (b & 240) + (data & 15) # modify lower bits, leaving higher bits in place
 
     # Get a given X,Y,Z or a tuple of three coordinates
     def get_block(self, x,y,z, coord=False):
@@ -472,3 +564,11 @@ class BlockArray(object):
 
         offset = y + z*128 + x*128*16 if (coord == False) else coord[1] + coord[2]*128 + coord[0]*128*16
         return self.blocksList[offset]
+
+    def get_data(self, x,y,z):
+        """Return the 4-bit data value of the block at x, y, z."""
+        offset = y + z*128 + x*128*16
+        if (offset % 2 == 1):
+            return self.dataList[offset // 2] >> 4
+        else:
+            return self.dataList[offset // 2] & 15
@@ -8,7 +8,7 @@ https://minecraft.gamepedia.com/Level_format
 import os, glob, re
 from . import region
 from . import chunk
-from .region import InconceivedChunk, Location
+from .region import InconceivedChunk, Location, RegionFileFormatError
 
 class UnknownWorldFormat(Exception):
     """Unknown or invalid world folder."""
@@ -206,6 +206,49 @@ class _BaseWorldFolder(object):
         for c in self.iter_nbt():
             yield self.chunkclass(c)
 
+    def iter_chunks_at(self, coords):
+        """
+        Return an iterable of (x, z, chunk) tuples for the chunks at the given chunk
+        coordinates x,z. Only those chunks are parsed, and each region file is opened
+        once. Chunks that are not yet generated or can not be read are left out.
+        """
+        # Chunk coordinates by region, in the order they were given
+        regions = {}
+        for x, z in coords:
+            regions.setdefault((x // 32, z // 32), []).append((x, z))
+
+        for (rx, rz), chunk_coords in regions.items():
+            if (rx, rz) not in self.regionfiles:
+                continue
+            close_after_use = False
+            if (rx, rz) in self.regions and not self.regions[rx, rz].closed:
+                regionfile = self.regions[(rx, rz)]
+            else:
+                regionfile = region.RegionFile(self.regionfiles[(rx, rz)], chunkclass = self.chunkclass)
+                regionfile.loc = Location(x=rx, z=rz)
+                close_after_use = True
+            try:
+                for x, z in chunk_coords:
+                    try:
+                        nbt = regionfile.get_nbt(x % 32, z % 32)
+                    except (InconceivedChunk, RegionFileFormatError):
+                        # Corrupt chunks are skipped, like in RegionFile.iter_chunks()
+                        continue
+                    yield x, z, self.chunkclass(nbt)
+            finally:
+                if close_after_use:
+                    regionfile.close()
+
+    def find_blocks(self, predicate):
+        """
+        Return an iterable of (x, y, z, name) tuples, in world coordinates, for every
+        block whose name satisfies predicate(name). For example, to find all spawners:
+        ```
+        world.find_blocks(lambda name: name == 'minecraft:spawner')
+        ```
+        """
+        raise NotImplementedError()
+
     def chunk_count(self):
         """Return a count of the chunks in this world folder."""
         c = 0
@@ -237,6 +280,19 @@ class McRegionWorldFolder(_BaseWorldFolder):
     extension = 'mcr'
     chunkclass = chunk.McRegionChunk
 
+    def find_blocks(self, predicate):
+        """
+        Return an iterable of (x, y, z, name) tuples, in world coordinates, for every
+        block whose name satisfies predicate(name).
+        McRegion chunks have no palette, so every block of every chunk is checked.
+        """
+        for c in self.iter_chunks():
+            cx, cz = c.get_coords()
+            for i, name in enumerate(c.iter_block()):
+                if predicate(name):
+                    # iter_block() yields the blocks in YZX order
+                    yield cx*16 + (i & 15), i >> 8, cz*16 + ((i >> 4) & 15), name
+
 
 class AnvilWorldFolder(_BaseWorldFolder):
     """Represents a world save using the new Anvil format."""
@@ -244,6 +300,40 @@ class AnvilWorldFolder(_BaseWorldFolder):
     extension = 'mca'
     chunkclass = chunk.AnvilChunk
 
+    def find_blocks(self, predicate):
+        """
+        Return an iterable of (x, y, z, name) tuples, in world coordinates, for every
+        block whose name satisfies predicate(name).
+        The predicate is first checked against the palette of each section, and
+        sections without any matching palette entry are skipped without decoding
+        their block states. Use this rather than iter_chunks() and iter_block()
+        to look for rare blocks like spawners or chests.
+        """
+        # Palettes repeat the same names over and over, only ask once per name
+        matching = {}
+        for nbt in self.iter_nbt():
+            version = None
+            cx, cz = nbt['xPos'].value, nbt['zPos'].value
+            for sy, palette, states in chunk.iter_section_tags(nbt):
+                names = [p['Name'].value for p in palette]
+                hits = set()
+                for i, name in enumerate(names):
+                    if name not in matching:
+                        matching[name] = bool(predicate(name))
+                    if matching[name]:
+                        hits.add(i)
+                if not hits:
+                    continue
+
+                if version is None:
+                    version = chunk.get_data_version(nbt)
+                a = {'Palette': palette, 'BlockStates': states}
+                indexes = chunk.AnvilSection(a, version).indexes
+                for i, p in enumerate(indexes):
+                    if p in hits:
+                        # Blocks are stored in YZX order
+                        yield cx*16 + (i & 15), sy*16 + (i >> 8), cz*16 + ((i >> 4) & 15), names[p]
+
 
 class _WorldFolderFactory(object):
     """Factory class: instantiate the subclassses in order, and the first instance 